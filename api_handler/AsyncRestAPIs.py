@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import time
+from threading import Lock, Thread
+
+import aiohttp
+
+from api_handler.RestAPIs import ftxAPI
+from api_handler.RateLimiter import RateLimiter
+
+
+class EventLoopThread:
+    """
+    One long lived event loop on a daemon thread, shared by every async api client.
+    run() submits a coroutine from any thread and blocks for its result.
+    """
+    _loop = None
+    _lock = Lock()
+
+    @classmethod
+    def loop(cls):
+        with cls._lock:
+            if cls._loop is None:
+                cls._loop = asyncio.new_event_loop()
+                Thread(target=cls._loop.run_forever, name='rest-event-loop', daemon=True).start()
+            return cls._loop
+
+    @classmethod
+    def run(cls, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, cls.loop()).result(timeout)
+
+
+async def gather(req_dict):
+    """
+    await a dict of coroutines concurrently, returns a dict of the results under the same keys
+    eg: await gather({'markets': api.markets(), 'futures': api.futures()})
+    """
+    results = await asyncio.gather(*req_dict.values())
+    return dict(zip(req_dict.keys(), results))
+
+
+class ftxAsyncAPI(ftxAPI):
+    """
+    asyncio version of ftxAPI with the same methods, each returns an awaitable.
+
+    Requests go through one aiohttp session per endpoint living on the EventLoopThread loop, so
+    connections are kept alive and any number of requests can be in flight without extra threads.
+    The RateLimiter budget and the public ResponseCache are shared with the blocking ftxAPI clients.
+    Methods that only wrap apiRequest are inherited and return its coroutine, methods that post
+    process the response are redefined here.
+    """
+    _aio_sessions = {}
+
+    @classmethod
+    def aioSession(cls, endpoint):
+        # only called from inside the event loop thread
+        if endpoint not in cls._aio_sessions or cls._aio_sessions[endpoint].closed:
+            connector = aiohttp.TCPConnector(limit_per_host=cls.POOL_SIZE, keepalive_timeout=60)
+            cls._aio_sessions[endpoint] = aiohttp.ClientSession(connector=connector,
+                                                                timeout=aiohttp.ClientTimeout(total=cls.TIMEOUT))
+        return cls._aio_sessions[endpoint]
+
+    def run(self, coro, timeout=None):
+        """
+        blocking call for use from Qt worker threads
+        """
+        return EventLoopThread.run(coro, timeout)
+
+    async def apiRequest(self, address, params, request_type):
+        if request_type == 'GET' and self.limiter.classify(request_type, address) == RateLimiter.PUBLIC:
+            return await self.cache.getAsync(address, lambda: self.sendRequest(address, params, request_type))
+        return await self.sendRequest(address, params, request_type)
+
+    async def sendRequest(self, address, params, request_type):
+        await self.limiter.acquireAsync(request_type, address)
+        url = self.endpoint + address
+        ts = int(time.time() * 1000)
+        signature = self.auth.get_signature(self.api_secret, ts, params, request_type, address)
+        headers = {'FTX-KEY': self.api_key or '',
+                   'FTX-SIGN': signature,
+                   'FTX-TS': str(ts),
+                   'Content-Type': 'application/json'}
+        # body matches the json body requests sends from ftxAPI.apiRequest
+        async with self.aioSession(self.endpoint).request(request_type, url, data=json.dumps(params),
+                                                          headers=headers) as response:
+            try:
+                data = await response.json(content_type=None)
+            except ValueError:
+                response.raise_for_status()
+                raise
+        return self.processData(data, address)
+
+    async def many(self, method, symbols):
+        """
+        fan out one request per symbol, eg: await api.many(api.futureStats, ['BTC-PERP', 'ETH-PERP'])
+        returns {symbol: response}
+        """
+        return await gather({symbol: method(symbol) for symbol in symbols})
+
+    async def futures(self):
+        path_url = '/api/futures'
+        response = await self.apiRequest(path_url, '', 'GET')
+        self.future = response
+        return response
+
+    async def predictedFunding(self, symbol):
+        path_url = f'/api/futures/{symbol}/stats'
+        self.future_stats = await self.apiRequest(path_url, {}, 'GET')
+        return str(round(self.future_stats['nextFundingRate'] * 100,2)) +'%'
+
+    async def lastFunding(self, symbol):
+        path_url = f'/api/funding_rates?future={symbol}'
+        response = await self.apiRequest(path_url, '', 'GET')
+        funding = str(round(response[0]['rate'] * 100,4)) + '%'
+        return funding
+
+    async def markPrice(self, symbol):
+        path_url = f'/api/futures/{symbol}'
+        response = await self.apiRequest(path_url, '', 'GET')
+        self.future = response
+        if self.future:
+            return str(self.future['mark'])
+        return ''
@@ -1,10 +1,47 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import pandas as pd
-import numpy as np
 from utils.utilfunc import mergeForMarketsList, aggregateTriggerOrders
 from utils.HttpNameConform import NamingConform
 from api_handler.RestAPIs import ftxAPI
+from api_handler.AsyncRestAPIs import ftxAsyncAPI, gather
+
+
+class RecordTable:
+    """
+    Rows for the account tables built straight from the api response lists, no DataFrame round trip.
+    rows are tuples of display values in the order of columns
+    """
+
+    def __init__(self, columns, rows=()):
+        self.columns = list(columns)
+        self.rows = list(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def column(self, name):
+        i = self.columns.index(name)
+        return [row[i] for row in self.rows]
+
+    @classmethod
+    def status(cls, text):
+        return cls(['Status'], [(text,)])
+
+    def isStatus(self, text):
+        return self.columns == ['Status'] and self.rows == [(text,)]
+
+    @classmethod
+    def fromRecords(cls, records, rename, columns, extra=None):
+        """
+        records: api response list of dicts, rename: api field -> display name as in NamingConform,
+        columns: display columns to keep, extra: {column: constant value} appended eg: the cancel button column
+        """
+        fields = {display: api for api, display in rename.items()}
+        keys = [fields.get(column, column) for column in columns]
+        extra = extra if extra else {}
+        constants = tuple(extra.values())
+        rows = [tuple(record.get(key) for key in keys) + constants for record in records]
+        return cls(list(columns) + list(extra.keys()), rows)
 
 
 class HttpCleaner:
@@ -14,11 +51,12 @@ class HttpCleaner:
             self.use_keys = self.testValidKeys(keys['FTX']['public'], keys['FTX']['private'])
         self.keys = keys
         self.ftx = ftxAPI(self.keys['FTX']['public'], self.keys['FTX']['private'])
+        self.ftx_async = ftxAsyncAPI(self.keys['FTX']['public'], self.keys['FTX']['private'])
 
         self.rename = NamingConform['FTX']['rename']
         self.display_columns = NamingConform['FTX']['display']
 
-        self.not_logged_in_df = pd.DataFrame({'Status': ['Not Logged In']})
+        self.not_logged_in_df = RecordTable.status('Not Logged In')
 
     def availableMarkets(self):
         """
@@ -54,7 +92,7 @@ class HttpCleaner:
                     ['24hr_price_change', 'change24h', 4]]
         for symbol in symbols:
             name = symbol['name']
-            symbolDict[name] = symbol
+            symbolDict[name] = dict(symbol) # responses are shared through the ftxAPI cache, dont modify them
             symbolDict[name]['quote_currency'] = 'USD'
             # rename
             for renamed, api_name, rounding in pairings:
@@ -79,33 +117,47 @@ class HttpCleaner:
             symbolDict[name]['24hr_vol'] = symbolDict[name]['24hr_vol']
         return symbolDict
 
-    def balances(self):
+    def accounts(self):
         """
-        Returns pandas dataframe for balances section
-
+        balances, positions and orders for the account section, the account requests are sent concurrently
+        """
+        if not self.use_keys:
+            return {'balances': self.balances(), 'positions': self.positions(), 'orders': self.orders()}
+        api = self.ftx_async
+        responses = api.run(gather({'balances': api.getAllBalances(),
+                                    'positions': api.getAllPositions(),
+                                    'open_orders': api.activeOrders(),
+                                    'trigger_orders': api.triggerOrders()}))
+        return {'balances': self.balances(responses['balances']),
+                'positions': self.positions(responses['positions']),
+                'orders': self.orders(responses['open_orders'], responses['trigger_orders'])}
+
+    def balances(self, response=None):
+        """
+        Returns RecordTable for balances section, sorted by USD value
+        response from getAllBalances is requested if not given
         """
         #dont request if there arent any api keys
         if not self.use_keys:
             return {'FTX' : self.not_logged_in_df}
         balances = {}
         # ftx
-        response = self.ftx.getAllBalances()
-        if response:
-            df = pd.DataFrame(response['main'])
-            df = df.rename(self.rename['balance'], axis=1)
-            df['USD Value'] = np.round(df['USD Value'],2 )
-            df = df.sort_values('USD Value', ascending=False)
-            df = df.reset_index()
-            df = df[self.display_columns['balance']]
-            balances['FTX'] = df
+        if response is None:
+            response = self.ftx.getAllBalances()
+        if response and 'main' in response:
+            records = sorted(response['main'], key=lambda balance: balance.get('usdValue') or 0, reverse=True)
+            for record in records:
+                record['usdValue'] = round(record.get('usdValue') or 0, 2)
+            balances['FTX'] = RecordTable.fromRecords(records, self.rename['balance'], self.display_columns['balance'])
         else:
             balances['FTX'] = self.not_logged_in_df
 
         return balances
 
-    def positions(self):
+    def positions(self, response=None):
         """
-        Returns pandas dataframe for positions section
+        Returns RecordTable for positions section
+        response from getAllPositions is requested if not given
         """
         #dont request if there arent any api keys
         if not self.use_keys:
@@ -114,29 +166,27 @@ class HttpCleaner:
 
         # ftx
         # the Api structure is different to content from website. entry price looks to be as at last funding
-        response = self.ftx.getAllPositions()
+        if response is None:
+            response = self.ftx.getAllPositions()
         if type(response) == list:
-            df = pd.DataFrame(response)
-            if len(df) != 0:
-                df = df.rename(self.rename['position'], axis=1)
-
-                df = df[df['Position Size'] != 0]
-                df['Avg Price'] = round(df['Avg Price'], 6)
-                df = df.reset_index()
-                df = df[self.display_columns['position']]
-
-                positions['FTX'] = df
+            records = [position for position in response if position.get('size')]
+            if records:
+                for record in records:
+                    if record.get('recentAverageOpenPrice') is not None:
+                        record['recentAverageOpenPrice'] = round(record['recentAverageOpenPrice'], 6)
+                positions['FTX'] = RecordTable.fromRecords(records, self.rename['position'],
+                                                           self.display_columns['position'])
             else:
-                positions['FTX'] = pd.DataFrame({'Status': ['No Open Positions']})
+                positions['FTX'] = RecordTable.status('No Open Positions')
         else:
             positions['FTX'] = self.not_logged_in_df
 
         return positions
 
-    def orders(self):
+    def orders(self, open_orders=None, trigger_orders=None):
         """
-        Returns pandas dataframe for positions orders section
-        open orders and trigger orders are on different endpoints
+        Returns RecordTables for positions orders section
+        open orders and trigger orders are on different endpoints, each is requested if not given
         """
         #dont request if there arent any api keys
         if not self.use_keys:
@@ -150,34 +200,29 @@ class HttpCleaner:
         # ftx orders
         orders['FTX'] = {}
         # open limit orders
-        open_orders = self.ftx.activeOrders()
+        if open_orders is None:
+            open_orders = self.ftx.activeOrders()
         if type(open_orders) == list:
-            df = pd.DataFrame(open_orders)
-            if len(df) != 0:
-                df = df.rename(self.rename['open_orders'], axis = 1)
-                df = df[self.display_columns['open_orders']]
-                df[' '] = 'Cancel Order'
-                orders['FTX']['open'] = df
-
+            if open_orders:
+                orders['FTX']['open'] = RecordTable.fromRecords(open_orders, self.rename['open_orders'],
+                                                                self.display_columns['open_orders'],
+                                                                extra={' ': 'Cancel Order'})
             else:
-                orders['FTX']['open'] = pd.DataFrame({'Status': ['No Open Orders']})
+                orders['FTX']['open'] = RecordTable.status('No Open Orders')
         else:
             orders['FTX']['open'] = self.not_logged_in_df
 
         #open trigger orders
-        trigger_orders = self.ftx.triggerOrders()
+        if trigger_orders is None:
+            trigger_orders = self.ftx.triggerOrders()
         trigger_orders_aggregated = aggregateTriggerOrders(trigger_orders)
         if type(trigger_orders) == list:
-            df = pd.DataFrame(trigger_orders)
-            if len(df) != 0:
-                df = df.rename(self.rename['trigger_orders'], axis = 1)
-                df = df[self.display_columns['trigger_orders']]
-                df[' '] = 'Cancel Trigger'
-
+            if trigger_orders:
+                orders['FTX']['trigger'] = RecordTable.fromRecords(trigger_orders, self.rename['trigger_orders'],
+                                                                   self.display_columns['trigger_orders'],
+                                                                   extra={' ': 'Cancel Trigger'})
             else:
-                df = pd.DataFrame({'Status': ['No Trigger Orders']})
-            orders['FTX']['trigger'] = df
-            #print(df)
+                orders['FTX']['trigger'] = RecordTable.status('No Trigger Orders')
         else:
             orders['FTX']['trigger'] = self.not_logged_in_df
         return {'orders_df': orders, 'trigger': trigger_orders_aggregated, 'open': open_orders}
@@ -57,14 +57,15 @@ class Execution:
         order_price = price + offset
 
 
-    def cancelPriceOrders(self, symbol, row, column, price, order_dict):
-        if price in order_dict.keys():
-            if 'open_order_id' in order_dict[price].keys():
-                order_ids = order_dict[price]['open_order_id']
+    def cancelPriceOrders(self, symbol, row, column, tick_index, order_dict):
+        # order_dict is the aggregated order dict of the ladder, keyed by tick index at the ladder grouping
+        if tick_index in order_dict.keys():
+            if 'open_order_id' in order_dict[tick_index].keys():
+                order_ids = order_dict[tick_index]['open_order_id']
                 for order_id in order_ids:
                     self.channel.cancel(symbol, order_id)
-            if 'trigger_order_id' in order_dict[price].keys():
-                order_ids = order_dict[price]['trigger_order_id']
+            if 'trigger_order_id' in order_dict[tick_index].keys():
+                order_ids = order_dict[tick_index]['trigger_order_id']
                 for order_id in order_ids:
                     self.channel.cancelTriggerOrder(order_id)
                 
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import copy
+import re
+import time
+from threading import Condition, Event, Lock
+
+
+class TokenBucket:
+    """
+    rate tokens a second up to capacity. not thread safe, RateLimiter holds its lock around every call
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.last = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def wait(self, floor=0.0):
+        """
+        seconds until a token can be taken without dropping the bucket below floor
+        """
+        self.refill()
+        missing = floor + 1 - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """
+    Central request scheduler in front of the REST api, shared by every ftxAPI/ftxAsyncAPI instance.
+
+    Each request takes a token from a global bucket and from the bucket of its endpoint. Requests are
+    put in one of three priority classes: ORDER (placing and cancelling orders), PRIVATE (account state)
+    and PUBLIC (market data). Lower classes may not take the last reserve fraction of the global bucket,
+    and wait while a higher class is waiting, so order entry always has budget during polling bursts.
+    """
+    ORDER = 0
+    PRIVATE = 1
+    PUBLIC = 2
+
+    ORDER_PATHS = ('/api/orders', '/api/conditional_orders')
+    PUBLIC_PATHS = ('/api/markets', '/api/futures', '/api/funding_rates', '/api/spot_margin/lending_rates')
+    # order ids in paths, so every cancel shares one endpoint bucket
+    ID_SEGMENT = re.compile(r'/(?:\d+|by_client_id/[^/]+)(?=/|$)')
+
+    def __init__(self, rate=100, capacity=25, reserve=(0.0, 0.2, 0.4), endpoint_rate=10, endpoint_capacity=10,
+                 endpoint_limits=None):
+        self.bucket = TokenBucket(rate, capacity)
+        self.floors = [fraction * capacity for fraction in reserve]
+        self.endpoint_rate = endpoint_rate
+        self.endpoint_capacity = endpoint_capacity
+        self.endpoint_limits = endpoint_limits if endpoint_limits else {}  # path -> (rate, capacity)
+        self.endpoints = {}
+        self.waiting = [0, 0, 0]
+        self.delayed = [0, 0, 0]
+        self.condition = Condition()
+
+    def classify(self, request_type, address):
+        path = self.endpointKey(address)
+        if request_type in ('POST', 'DELETE') and path.startswith(self.ORDER_PATHS):
+            return self.ORDER
+        if path.startswith(self.PUBLIC_PATHS):
+            return self.PUBLIC
+        return self.PRIVATE
+
+    @staticmethod
+    def endpointKey(address):
+        """
+        path template of an address, eg: /api/orders/123?x=1 -> /api/orders/:id
+        """
+        return RateLimiter.ID_SEGMENT.sub('/:id', address.split('?')[0])
+
+    def endpointBucket(self, path):
+        if path not in self.endpoints:
+            rate, capacity = self.endpoint_limits.get(path, (self.endpoint_rate, self.endpoint_capacity))
+            self.endpoints[path] = TokenBucket(rate, capacity)
+        return self.endpoints[path]
+
+    def _tryAcquire(self, priority, path):
+        """
+        takes the tokens and returns 0 or returns the seconds to wait, called with the condition held
+        """
+        if any(self.waiting[:priority]):
+            # a higher class is queued, check back once it has had a chance to go
+            return 1 / self.bucket.rate
+        endpoint = self.endpointBucket(path)
+        wait = max(self.bucket.wait(self.floors[priority]), endpoint.wait())
+        if wait:
+            return wait
+        self.bucket.take()
+        endpoint.take()
+        return 0.0
+
+    def acquire(self, request_type, address):
+        """
+        block the calling thread until the request may be sent, returns its priority class
+        """
+        priority = self.classify(request_type, address)
+        path = self.endpointKey(address)
+        with self.condition:
+            wait = self._tryAcquire(priority, path)
+            if wait:
+                self.delayed[priority] += 1
+                self.waiting[priority] += 1
+                try:
+                    while wait:
+                        self.condition.wait(wait)
+                        wait = self._tryAcquire(priority, path)
+                finally:
+                    self.waiting[priority] -= 1
+                    self.condition.notify_all()
+        return priority
+
+    async def acquireAsync(self, request_type, address):
+        """
+        acquire() for coroutines, waits with asyncio.sleep so the event loop keeps running
+        """
+        priority = self.classify(request_type, address)
+        path = self.endpointKey(address)
+        with self.condition:
+            wait = self._tryAcquire(priority, path)
+            if not wait:
+                return priority
+            self.delayed[priority] += 1
+            self.waiting[priority] += 1
+        try:
+            while wait:
+                await asyncio.sleep(wait)
+                with self.condition:
+                    wait = self._tryAcquire(priority, path)
+        finally:
+            with self.condition:
+                self.waiting[priority] -= 1
+                self.condition.notify_all()
+        return priority
+
+
+class SingleFlight:
+    """
+    coalesces identical calls, callers asking for a key already in flight wait for its result instead of
+    making their own call. callers that joined get a copy so the responses can be modified independently
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+        self._tasks = {}
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': Event(), 'result': None, 'error': None, 'followers': 0}
+            else:
+                call['followers'] += 1
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return copy.deepcopy(call['result'])
+        try:
+            result = function()
+            call['result'] = result
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                followers = call['followers']
+            call['done'].set()
+        # the followers copy call['result'], the leader must not hand out the same object
+        return copy.deepcopy(result) if followers else result
+
+    async def doAsync(self, key, coroutine_function):
+        """
+        do() for coroutines, all callers must be on the same event loop
+        """
+        if key in self._tasks:
+            task, joined = self._tasks[key]
+            joined[0] += 1
+            return copy.deepcopy(await asyncio.shield(task))
+        task = asyncio.ensure_future(coroutine_function())
+        joined = [0]
+        self._tasks[key] = (task, joined)
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            if self._tasks.get(key, (None,))[0] is task:
+                del self._tasks[key]
+        return copy.deepcopy(result) if joined[0] else result
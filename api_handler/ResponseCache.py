@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+from threading import Lock
+
+from api_handler.RateLimiter import SingleFlight
+
+
+class ResponseCache:
+    """
+    Short lived cache of REST responses keyed by request address, with a TTL per endpoint path.
+
+    A miss is fetched through SingleFlight so concurrent callers of the same address share one request.
+    Paths without a TTL are never stored but are still coalesced. Cached responses are shared between
+    callers and must be treated as read only. Error responses are not stored.
+    Expired entries are removed when they are looked up, and swept from the whole cache every SWEEP_S.
+    """
+    SWEEP_S = 60.0
+
+    def __init__(self, ttls=None, default_ttl=0.0):
+        self.ttls = ttls if ttls else {}  # path -> seconds
+        self.default_ttl = default_ttl
+        self.entries = {}  # address -> (expiry, response)
+        self.flight = SingleFlight()
+        self._lock = Lock()
+        self._swept = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl(self, address):
+        return self.ttls.get(address.split('?')[0], self.default_ttl)
+
+    def lookup(self, address):
+        with self._lock:
+            entry = self.entries.get(address)
+            if entry:
+                if entry[0] > time.monotonic():
+                    self.hits += 1
+                    return True, entry[1]
+                del self.entries[address]
+            self.misses += 1
+            return False, None
+
+    def store(self, address, response):
+        ttl = self.ttl(address)
+        if ttl <= 0 or (type(response) == dict and response.get('success') is False):
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.entries[address] = (now + ttl, response)
+            if now - self._swept > self.SWEEP_S:
+                # addresses that are not asked for again are never looked up
+                self._swept = now
+                for expired in [address for address, entry in self.entries.items() if entry[0] <= now]:
+                    del self.entries[expired]
+
+    def get(self, address, fetch):
+        """
+        cached response for address, calling fetch() on a miss
+        """
+        found, response = self.lookup(address)
+        if found:
+            return response
+        return self.flight.do(address, lambda: self._fetch(address, fetch))
+
+    def _fetch(self, address, fetch):
+        response = fetch()
+        self.store(address, response)
+        return response
+
+    async def getAsync(self, address, fetch):
+        """
+        get() for coroutines, fetch is a coroutine function
+        """
+        found, response = self.lookup(address)
+        if found:
+            return response
+        return await self.flight.doAsync(address, lambda: self._fetchAsync(address, fetch))
+
+    async def _fetchAsync(self, address, fetch):
+        response = await fetch()
+        self.store(address, response)
+        return response
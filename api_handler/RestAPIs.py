@@ -3,13 +3,49 @@
 
 import requests
 import time
+from threading import Lock
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from auth.Authenticator import Authenticator
+from api_handler.RateLimiter import RateLimiter
+from api_handler.ResponseCache import ResponseCache
 
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
 class ftxAPI:
+    """
+    connections are kept alive in one pooled requests.Session per host, shared by every ftxAPI instance
+    (the http threads, the private ladder threads and Execution) so requests skip the tcp/tls handshake
+    """
+    POOL_SIZE = 20 #max open connections per host
+    RETRIES = 2 #connection errors, and 429/5xx responses for idempotent methods. orders are never resent
+    BACKOFF = 0.1 #seconds, doubled on each retry
+    TIMEOUT = 10 #seconds
+
+    limiter = RateLimiter()
+    # seconds public responses are reused for, kept below the quote board poll interval
+    cache = ResponseCache(ttls={'/api/markets': 2.0,
+                                '/api/futures': 2.0,
+                                '/api/funding_rates': 10.0,
+                                '/api/spot_margin/lending_rates': 10.0})
+
+    _sessions = {}
+    _session_lock = Lock()
+
+    @classmethod
+    def session(cls, endpoint):
+        with cls._session_lock:
+            if endpoint not in cls._sessions:
+                retry = Retry(total=cls.RETRIES, connect=cls.RETRIES, read=0, backoff_factor=cls.BACKOFF,
+                              status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cls.POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount(endpoint, adapter)
+                cls._sessions[endpoint] = session
+            return cls._sessions[endpoint]
+
     def __init__(self, public = None, private = None):
         self.endpoint = 'https://ftx.com'
         self.api_key = public
@@ -183,7 +219,9 @@ class ftxAPI:
         return response
     
     def fundingRates(self):
-        start, end = int(time.time() - 60*60), int(time.time() + 60*60)
+        # the window moves in 10 minute steps so the address stays the same for the cache between polls
+        now = int(time.time()) // 600 * 600
+        start, end = now - 60*60, now + 60*60 + 600
         path_url = f'/api/funding_rates?start_time={start}&end_time={end}'
         req_param = {'start_time': start,
                      'end_time': end}
@@ -344,6 +382,13 @@ class ftxAPI:
         return response
 
     def apiRequest(self, address, params, request_type):
+        if request_type == 'GET' and self.limiter.classify(request_type, address) == RateLimiter.PUBLIC:
+            # market data is shared between windows through the cache, concurrent misses make one request
+            return self.cache.get(address, lambda: self.sendRequest(address, params, request_type))
+        return self.sendRequest(address, params, request_type)
+
+    def sendRequest(self, address, params, request_type):
+        self.limiter.acquire(request_type, address)
         url = self.endpoint + address
         ts = int(time.time() * 1000)
         request = requests.Request(request_type, url, json=params)
@@ -354,8 +399,7 @@ class ftxAPI:
         prepared.headers['FTX-KEY'] = self.api_key
         prepared.headers['FTX-SIGN'] = signature
         prepared.headers['FTX-TS'] = str(ts)
-        session = requests.Session()
-        response = session.send(prepared)
+        response = self.session(self.endpoint).send(prepared, timeout=self.TIMEOUT)
         return self.processResponse(response, address)
 
     def processResponse(self, response, address):
@@ -365,11 +409,14 @@ class ftxAPI:
             response.raise_for_status()
             raise
         else:
-            if not data['success']:
-                print(['[API MESSAGE] - ', data, address])
-                error_dict = {'success': False}
-                if address.split('/')[-1] in ['conditional_orders', 'orders']:
-                    error_dict['order_fail'] = True
-                return error_dict
-            else:
-                return data['result']
+            return self.processData(data, address)
+
+    def processData(self, data, address):
+        if not data['success']:
+            print(['[API MESSAGE] - ', data, address])
+            error_dict = {'success': False}
+            if address.split('/')[-1] in ['conditional_orders', 'orders']:
+                error_dict['order_fail'] = True
+            return error_dict
+        else:
+            return data['result']
@@ -22,7 +22,11 @@ quote_board_colors = {'percent_changes': {'negative': {'tier1': ['#f5c9d5', 0, '
 
                                           },
                       'header' : {'background': '#364b70',
-                                  'color': 'white'}}
+                                  'color': 'white'},
+                      # overlay on a quote board cell after its value changes [color, alpha]
+                      'flash': {'up': ['#04de8f', 110],
+                                'down': ['#f75784', 110],
+                                'changed': ['#ffff00', 110]}}
 
 
 
@@ -8,23 +8,24 @@ import sys
 import json
 import os
 import time
-import re
-import numpy as np
 from functools import partial
 from collections import defaultdict
 import pandas as pd
 
 from core_windows.Dom import DomWindow
 from app_styles.AppStyles import quote_board_colors
-from api_handler.DataManager import HttpCleaner
+from api_handler.DataManager import HttpCleaner, RecordTable
 from api_handler.RestAPIs import ftxAPI
 from ws_streams.Runnables import httpRequestPublicThread, httpRequestPrivateThread, WebsocketThread
 from utils.SoundEffects import SoundEffects
 from utils.utilfunc import aggregateTriggerOrders
+from utils.Formulas import FormulaEngine
 from custom_qt.CustomWidgets import (CustomButtonClass, ComboBox, TableWidgetItem, ListSlider, Toggle)
-from custom_qt.CustomModels import (CheckablePandasModel, DataFrameModel)
+from custom_qt.CustomModels import (CheckablePandasModel, RecordTableModel, QuoteTableModel,
+                                    TradeTapeModel, FlashRole, changeDirection)
 from custom_qt.CustomDelegates import (MarketQuoteBoardDelegate, LastQuoteBoardDelegate, MarginQuoteBoardDelegate,
-                                   BasisQuoteBoardDelegate, AlignDelegate, StyleActivityCells)
+                                   BasisQuoteBoardDelegate, AlignDelegate, ActivityDelegate,
+                                   activityStyleKey, price_format)
 from utils.defines import SoundOptions
 from utils.defines import EmptySettings
 
@@ -503,24 +504,33 @@ class SubscriptionDialog(PyQt5.QtWidgets.QDialog):
         self.accept()
         self.trade_sub_update_signal.emit(self.choices)
 
-class ActivityWindow(PyQt5.QtWidgets.QTableWidget):
-    def __init__(self):
+class ActivityWindow(PyQt5.QtWidgets.QTableView):
+    """
+    trade tape, the last capacity large trades in a TradeTapeModel ring buffer
+    """
+    def __init__(self, capacity=5000):
         super().__init__()
         color, background = quote_board_colors['header']['color'], quote_board_colors['header']['background']
         self.setStyleSheet("QHeaderView:section {" + f'color:{color}; background-color:{background};' + 'font:bold}')
-        self.setRowCount(0)
         self.colnames = ['Time', 'Market', 'Price', 'USD']
         self.columns = ['time', 'market', 'price', 'USD']
-        self.setColumnCount(len(self.columns))
-
-        for i, col in enumerate(self.colnames):
-            self.setHorizontalHeaderItem(i, TableWidgetItem(col))
+        self.tape = TradeTapeModel(self.columns, self.colnames, capacity=capacity,
+                                   formatters={'price': price_format}, style_key=activityStyleKey)
+        self.setModel(self.tape)
+        self.setItemDelegate(ActivityDelegate(self))
+        self.tape.rowsInserted.connect(self.rowsAdded)
 
         self.verticalHeader().setVisible(False)
         self.verticalHeader().setDefaultSectionSize(16)
 
         self.horizontalHeader().setSectionResizeMode(len(self.columns)-1, PyQt5.QtWidgets.QHeaderView.Stretch)
 
+    def rowsAdded(self, parent, first, last):
+        # once per batch of trades
+        for row in range(first, last + 1):
+            self.resizeRowToContents(row)
+        self.scrollToBottom()
+
 
 class ActivityWindowSection(PyQt5.QtWidgets.QWidget):
     update_trade_sub_signal = PyQt5.QtCore.pyqtSignal(str, dict)
@@ -533,7 +543,7 @@ class ActivityWindowSection(PyQt5.QtWidgets.QWidget):
         self.markets = self.parent().available_markets['FTX']
         self.selections = self.settings['trade_subs']['FTX']
         frame_image = self.settings['themes']['frame']
-        self.setStyleSheet("QTableWidget {background-color: white; gridline-color: #76458a; border:1px solid black}"
+        self.setStyleSheet("QTableView {background-color: white; gridline-color: #76458a; border:1px solid black}"
                            "QScrollBar {height:0px;}"
                            ".QFrame {background-color: #e6dddc; background-image: " + f"url({frame_image})" + "}")
         self.frame = PyQt5.QtWidgets.QFrame()
@@ -570,20 +580,11 @@ class ActivityWindowSection(PyQt5.QtWidgets.QWidget):
         self.threads.append(downloader)
 
     def populateWindow(self, data):
-        for trade in data:
-            row_position = self.activity_window.rowCount()  # - 100
-            self.activity_window.insertRow(row_position)
-            for i, col in enumerate(self.activity_window.columns):
-                cell = StyleActivityCells(trade, col)
-                if trade['type'][0] == 'liq':
-                    self.play_sound_signal.emit('liquidation')
-                self.activity_window.setItem(row_position, i, cell)
-            self.activity_window.resizeRowToContents(row_position)
-            self.activity_window.scrollToItem(self.activity_window.item(row_position, 0))
-            self.activity_window.selectRow(
-                row_position)  # this and below line ensure the table is fully scrolled to the bottom.doesnt work otherwise
-            self.activity_window.clearSelection()
+        self.activity_window.tape.append(data)
+        if any(trade['type'][0] == 'liq' for trade in data):
+            self.play_sound_signal.emit('liquidation')
         if self.display_count == 0 and data: #data can be empty list
+            self.activity_window.tape.flush()
             self.activity_window.resizeColumnToContents(0)
             self.display_count += 1
 
@@ -597,16 +598,16 @@ class ActivityWindowSection(PyQt5.QtWidgets.QWidget):
 
     def updateSettings(self, data):
         self.update_trade_sub_signal.emit('trade_subs', {'FTX': data})
-        subbed_markets = [sub['market'] for sub in self.threads[0].stream._subscriptions]
+        subbed_markets = list(self.threads[0].markets)
         for sub in data:
             if sub not in subbed_markets:
-                self.threads[0].stream.get_trades(sub)
+                self.threads[0].addMarket(sub)
         for subbed in subbed_markets:
             if subbed not in data:
-                self.threads[0].stream._unsubscribe({'channel': 'trades', 'market': subbed})
+                self.threads[0].removeMarket(subbed)
 
     def updateStyle(self, image):
-        self.setStyleSheet("QTableWidget {background-color: white; gridline-color: #76458a; border:1px solid black}"
+        self.setStyleSheet("QTableView {background-color: white; gridline-color: #76458a; border:1px solid black}"
                            "QScrollBar {height:0px;}"
                            ".QFrame {background-color: #e6dddc; background-image: " + f"url({image})" + "}")
 
@@ -831,8 +832,7 @@ class MasterQuoteBoard(PyQt5.QtWidgets.QTableView):
                          '24hrΔ', '24hr USD', 'Lend APY']
         self.mapping = {k: v for k, v in zip(self.columns, self.colnames)}
 
-        init_frame = np.full((100, len(self.columns)), '-')
-        self.model = DataFrameModel(df=pd.DataFrame(init_frame, columns=self.columns), mapping=self.mapping)
+        self.model = QuoteTableModel(self.columns, mapping=self.mapping)
         self.view = PyQt5.QtWidgets.QTableView()
         self.proxy = PyQt5.QtCore.QSortFilterProxyModel(self)
         self.proxy.setSourceModel(self.model)
@@ -868,8 +868,7 @@ class MasterQuoteBoard(PyQt5.QtWidgets.QTableView):
         self.setLayout(layout)
 
     def displayQuotes(self, df):
-        df = df[self.columns]
-        self.model.setDataFrame(df)
+        self.model.setTable(df)
 
 
 class QuoteBoard(PyQt5.QtWidgets.QTableWidget):
@@ -888,6 +887,13 @@ class QuoteBoard(PyQt5.QtWidgets.QTableWidget):
         self.settings = settings
 
         self.display_count = 0
+        self.formulas = FormulaEngine()
+        # cell -> time its flash ends, cleared by the flash timer
+        self.flash_ms = 600
+        self.flashing = {}
+        self.flash_timer = PyQt5.QtCore.QTimer(self)
+        self.flash_timer.setSingleShot(True)
+        self.flash_timer.timeout.connect(self.expireFlashes)
 
         self.setShowGrid(False)
 
@@ -950,44 +956,19 @@ class QuoteBoard(PyQt5.QtWidgets.QTableWidget):
                 selRows.append(item.row())
         return selRows[0]
 
-    def calcSpecialFormalas(self, df, formulas):
-        df['name_adj'] = df['name'].apply(lambda x: x.replace('-', '_').replace('/', '_'))
-        df = df.set_index('name_adj')
-        numbers_df = df[['last', 'basis', 'rate', 'change1h', 'change24h', 'volumeUsd24h']]
-        t = numbers_df.T
-        df = df.reset_index()
-        df = df.set_index('name')
-        specials = pd.DataFrame()
-        for k, v in formulas.items():
-            temp = pd.DataFrame()
-            try:
-                temp[k] = pd.eval(v)
-                temp.T['last'] = np.round(temp.T['last'], 6)
-                specials = specials.append(temp.T)
-            except:
-                temp[k] = 'na'
-
-        df = df.append(specials)
-        return df
-
     def displayQuotes(self, df):
-        formulas = {}
+        formulas = []
         for i in range(self.rowCount()):
             col1 = self.item(i, 0)
-            if not col1:
-                continue
-            col1 = col1.text()
-            col1 = self.item(i, 0).text()
-            if col1.startswith('?'):
-                # TODO make into 1 regex
-                # substitues the '/' and '-' to in order to allow divide and subtract in special formula
-                formula = re.sub(r'(\[[^\/\]]*)(\/)([^\/\]]*\])', r'\1_\3', col1)
-                formula = re.sub(r'(\[[^-\]]*)(-)([^-\]]*\])', r'\1_\3', formula)
-                for n, rep in [['?', ''], [']', ''], ['FTX:', ''], ['[', 't.']]:
-                    formula = formula.replace(n, rep)
-                formulas[col1] = formula
-        df = self.calcSpecialFormalas(df, formulas)
+            if col1 and col1.text().startswith('?'):
+                formulas.append(col1.text())
+        # formulas are compiled once and only re-evaluated when one of their markets moved
+        self.formulas.sync(formulas)
+        specials = self.formulas.update(dict(zip(df['name'], df['last'])))
         columns = ['exchange:market', 'last', 'basis', 'rate', 'change1h', 'change24h', 'volumeUsd24h']
+        # one pass over the frame instead of a df.loc lookup per cell, column by column so each keeps its dtype
+        quotes = dict(zip(df['name'], zip(*(df[column].tolist() for column in columns[1:]))))
+        quotes.update((text, [result]) for text, result in specials.items())
         custom_markets = {}
         for row in range(self.rowCount()):
             col1 = self.item(row, 0)
@@ -997,15 +978,12 @@ class QuoteBoard(PyQt5.QtWidgets.QTableWidget):
             if col1 != '':
                 col1 = col1.replace('FTX:', '') if not col1.startswith('?') else col1
                 col_end = 2 if col1.startswith('?') else len(columns)
-                try:
-                    for j, column in enumerate(columns[1:col_end], 1):
-                        value = df.loc[col1][column]
-                        if col1.startswith('~') or col1 == '':
-                            value = ''
-
-                        self.item(row, j).setText(str(value))
-                except Exception as e:
-                    pass
+                if col1 not in quotes:
+                    continue
+                for j, value in enumerate(quotes[col1][:col_end - 1], 1):
+                    if col1.startswith('~'):
+                        value = ''
+                    self.setCellText(row, j, str(value))
 
             else:
                 for i in range(len(columns)):
@@ -1025,6 +1003,35 @@ class QuoteBoard(PyQt5.QtWidgets.QTableWidget):
             self.quote_board_signal.emit('quoteboard', custom_markets)
             self.settings = custom_markets
 
+    def setCellText(self, row, column, text):
+        """
+        only touch cells whose text changed, a changed cell flashes for flash_ms
+        """
+        cell = self.item(row, column)
+        if cell is None:
+            return
+        previous = cell.text()
+        if previous == text:
+            return
+        cell.setText(text)
+        if self.flash_ms and previous != '':
+            cell.setData(FlashRole, changeDirection(previous, text))
+            self.flashing[cell] = time.monotonic() + self.flash_ms / 1000
+            if not self.flash_timer.isActive():
+                self.flash_timer.start(self.flash_ms)
+
+    def expireFlashes(self):
+        now = time.monotonic()
+        for cell, until in list(self.flashing.items()):
+            if until <= now:
+                del self.flashing[cell]
+                try:
+                    cell.setData(FlashRole, 0)
+                except RuntimeError:
+                    pass  # the row was deleted
+        if self.flashing:
+            self.flash_timer.start(max(int((min(self.flashing.values()) - now) * 1000), 0))
+
     def close(self):
         for thread in self.threads:
             thread.stop()
@@ -1067,7 +1074,7 @@ class QuoteBoardSection(PyQt5.QtWidgets.QWidget):
     def quotesStream(self):
         self.threads = []
         self.quote_thread_pool = PyQt5.QtCore.QThreadPool()
-        downloader = httpRequestPublicThread(feed='quote_board')
+        downloader = httpRequestPublicThread(feed='quote_board', refresh_ms=self.settings.get('quote_refresh_ms', 6000))
         downloader.signals.quotes_signal.connect(self.updateQuoteBoard)
         self.threads.append(downloader)
         self.quote_thread_pool.start(downloader)
@@ -1301,20 +1308,28 @@ class OrderPosition(PyQt5.QtWidgets.QWidget):
         self.tabs.addTab(self.ftx_account.account_tab, PyQt5.QtGui.QIcon('assets/ftx1.svg'), '')
         self.tabs.setIconSize(PyQt5.QtCore.QSize(18, 20))
 
-        self.open_order_model = DataFrameModel(
-            df=pd.DataFrame(columns=['Market', 'Side', 'Size', 'Price', 'Reduce Only',
-                                     'Filled', 'Order ID', ' ']))
+        self.open_order_model = RecordTableModel(
+            RecordTable(['Market', 'Side', 'Size', 'Price', 'Reduce Only', 'Filled', 'Order ID', ' ']))
 
         self.ftx_account.limit_table.setModel(self.open_order_model)
         self.ftx_account.limit_table.setItemDelegate(AlignDelegate())
 
-        self.open_trigger_model = DataFrameModel(
-            df=pd.DataFrame(columns=['Market', 'Type', 'Order Type', 'Side', 'Size',
-                                     'Filled Size', 'Limit Price', 'Trigger Price', 'Order ID', ' ']))
+        self.open_trigger_model = RecordTableModel(
+            RecordTable(['Market', 'Type', 'Order Type', 'Side', 'Size',
+                         'Filled Size', 'Limit Price', 'Trigger Price', 'Order ID', ' ']))
 
         self.ftx_account.trigger_table.setModel(self.open_trigger_model)
         self.ftx_account.trigger_table.setItemDelegate(AlignDelegate())
 
+        # models are kept and updated in place so only changed rows are repainted
+        self.balance_model = RecordTableModel()
+        self.ftx_account.balance_table.setModel(self.balance_model)
+        self.ftx_account.balance_table.setItemDelegate(AlignDelegate())
+
+        self.position_model = RecordTableModel()
+        self.ftx_account.position_table.setModel(self.position_model)
+        self.ftx_account.position_table.setItemDelegate(AlignDelegate())
+
         self.cancel_widget_dict = {}
         self.cancel_trigger_widget_dict = {}
 
@@ -1343,45 +1358,39 @@ class OrderPosition(PyQt5.QtWidgets.QWidget):
 
     def displayAccounts(self, data):
         balances, positions, orders = data['balances'], data['positions'], data['orders']['orders_df']
-        if balances['FTX'].iloc[0].values[0] == 'Not Logged In':
+        if balances['FTX'].isStatus('Not Logged In'):
             total_usd_balance = 'Not Logged In'
         else:
-            total_usd_balance = round(balances['FTX']['USD Value'].sum(), 2)
+            total_usd_balance = round(sum(balances['FTX'].column('USD Value')), 2)
             total_usd_balance = f'{total_usd_balance:,.2f} USD'
         self.ftx_account.balance_heading_line.setText(f'Balances - {total_usd_balance}')
         accounts = [self.ftx_account]
         for exchange, account in zip(['FTX'], accounts):
-            model = DataFrameModel(balances[exchange])
-            account.balance_table.setModel(model)
-            account.balance_table.setItemDelegate(AlignDelegate())
+            self.balance_model.setRecords(balances[exchange])
+            self.position_model.setRecords(positions[exchange])
 
-            position_model = DataFrameModel(positions[exchange])
-            account.position_table.setModel(position_model)
-            account.position_table.setItemDelegate(AlignDelegate())
-
-            self.open_order_model.setDataFrame(orders[exchange]['open'])
+            self.open_order_model.setRecords(orders[exchange]['open'])
             # add in the cancel buttons for open limit orders
             for i in range(len(orders[exchange]['open'])):
                 button_exists = account.limit_table.indexWidget(self.open_order_model.index(i, 7))
                 if not button_exists:
-                    orderID = self.open_order_model.index(i, 6).data(PyQt5.QtCore.Qt.DisplayRole)
                     self.cancel_widget_dict[str(i)] = PyQt5.QtWidgets.QPushButton('Cancel Order')
                     self.cancel_widget_dict[str(i)].setStyleSheet(
                         "QPushButton {background-color: red; color: white; font: bold}")  # fa0a4d
-                    self.cancel_widget_dict[str(i)].clicked.connect(partial(self.cancel_order, orderID))
+                    # rows are updated in place, so the order id is read when clicked
+                    self.cancel_widget_dict[str(i)].clicked.connect(partial(self.cancelOrderAtRow, i))
                     account.limit_table.setIndexWidget(self.open_order_model.index(i, 7),
                                                        self.cancel_widget_dict[str(i)])
             account.limit_table.setMinimumHeight(account.getLimitTableSize(len(orders[exchange]['open'])))
 
-            self.open_trigger_model.setDataFrame(orders[exchange]['trigger'])
+            self.open_trigger_model.setRecords(orders[exchange]['trigger'])
             for i in range(len(orders[exchange]['trigger'])):
                 button_exists = account.trigger_table.indexWidget(self.open_trigger_model.index(i, 9))
                 if not button_exists:
-                    orderID = self.open_trigger_model.index(i, 8).data(PyQt5.QtCore.Qt.DisplayRole)
                     self.cancel_trigger_widget_dict[str(i)] = PyQt5.QtWidgets.QPushButton('Cancel Trigger')
                     self.cancel_trigger_widget_dict[str(i)].setStyleSheet(
                         "QPushButton {background-color: red; color: white; font: bold}")  # fa0a4d
-                    self.cancel_trigger_widget_dict[str(i)].clicked.connect(partial(self.cancel_trigger_order, orderID))
+                    self.cancel_trigger_widget_dict[str(i)].clicked.connect(partial(self.cancelTriggerOrderAtRow, i))
                     account.trigger_table.setIndexWidget(self.open_trigger_model.index(i, 9),
                                                          self.cancel_trigger_widget_dict[str(i)])
             account.trigger_table.setMinimumHeight(account.getLimitTableSize(len(orders[exchange]['trigger'])))
@@ -1409,6 +1418,12 @@ class OrderPosition(PyQt5.QtWidgets.QWidget):
     def cancel_trigger_order(self, orderID):
         self.channel.cancelTriggerOrder(orderID)
 
+    def cancelOrderAtRow(self, row):
+        self.cancel_order(self.open_order_model.index(row, 6).data(PyQt5.QtCore.Qt.DisplayRole))
+
+    def cancelTriggerOrderAtRow(self, row):
+        self.cancel_trigger_order(self.open_trigger_model.index(row, 8).data(PyQt5.QtCore.Qt.DisplayRole))
+
     def close(self):
         for thread in self.threads:
             thread.stop()
@@ -22,7 +22,8 @@ from api_handler.DataManager import HttpCleaner
 class DomWidget(PyQt5.QtWidgets.QWidget):
     all_ladders = PyQt5.QtCore.pyqtSignal(object)
 
-    def __init__(self, exchange=None, contract=None, specs=None, keys=None, launch_agg=None):
+    def __init__(self, exchange=None, contract=None, specs=None, keys=None, launch_agg=None, refresh_rate=60,
+                 groupings=()):
         super().__init__()
         self.exchange = exchange
         self.contract = contract
@@ -34,7 +35,8 @@ class DomWidget(PyQt5.QtWidgets.QWidget):
         self.multiplier = 1 / self.tick
         self.last_trade = self.specs['last_price']
         self.len_text_prices = len(str(self.last_trade))
-        self.model = TableModel(self.specs, launch_agg=self.launch_agg)
+        self.groupings = groupings
+        self.model = TableModel(self.specs, launch_agg=self.launch_agg, refresh_rate=refresh_rate)
         self.view = TableView()
         self.proxy = PyQt5.QtCore.QSortFilterProxyModel(self)
         self.proxy.setSourceModel(self.model)
@@ -55,7 +57,7 @@ class DomWidget(PyQt5.QtWidgets.QWidget):
         layout.addWidget(self.view)
         self.setLayout(layout)
 
-        self.current_index = self.model.default_length - self.specs['last_price'] * self.multiplier
+        self.current_index = self.model.priceRow(self.specs['last_price'])
 
         self.streamingPublic(self.launch_agg)
         self.center()
@@ -95,7 +97,8 @@ class DomWidget(PyQt5.QtWidgets.QWidget):
         downloader = DownloadPublicThread(exchange=self.exchange,
                                           contract=self.contract,
                                           specs=self.specs,
-                                          launch_agg=launch_agg)
+                                          launch_agg=launch_agg,
+                                          groupings=self.groupings)
         downloader.signals.price_feed_signal.connect(self.updateBook)
         downloader.signals.last_trade_signal.connect(self.updateCurrentIndex)
         downloader.signals.volume_profile_signal.connect(self.updateVolumeProfile)
@@ -129,7 +132,18 @@ class DomWidget(PyQt5.QtWidgets.QWidget):
     def updateCurrentIndex(self, last_trade):
         # pass
         self.last_trade = last_trade
-        self.current_index = self.model.default_length - int(last_trade * self.multiplier)
+        self.growTable(last_trade)
+        self.current_index = self.model.priceRow(last_trade)
+
+    def growTable(self, price):
+        """
+        extend the ladder when price nears its top or bottom, rows added above push the view down so
+        scroll by the same amount to keep the visible prices in place
+        """
+        added = self.model.ensureRow(price)
+        if added:
+            scroll_bar = self.view.verticalScrollBar()
+            scroll_bar.setValue(scroll_bar.value() + added)
 
 class MainWindow(PyQt5.QtWidgets.QMainWindow):
     def __init__(self):
@@ -175,7 +189,7 @@ class DomWindow(MainWindow):
         self.private_active = False
 
         self.dom = DomWidget(exchange=self.exchange, contract=self.contract, specs=self.specs,
-                             launch_agg=self.launch_aggregation)
+                             launch_agg=self.launch_aggregation, groupings=self.choices)
         self.dom.view.item_right_clicked.connect(partial(self.cancelOrder))
         self.dom.view.item_left_clicked.connect(partial(self.routeOrder))
         self.dom.view.middle_clicked.connect(self.centerAllLadders)
@@ -432,7 +446,7 @@ class DomWindow(MainWindow):
             row, column = index.row(), index.column()
             self.post_only_flag = self.post_only.isChecked()
             self.reduce_only_flag = self.reduce_only.isChecked()
-            price = self.dom.model.price_colum_num[row]
+            price = self.dom.model.priceAt(row)
             order_response = self.execution.execute(row, column, price, self.order_box.value(), self.post_only_flag,
                                    self.reduce_only_flag)
             self.setFocus()
@@ -446,7 +460,7 @@ class DomWindow(MainWindow):
             row, column = index.row(), index.column()
             self.post_only_flag = self.post_only.isChecked()
             self.reduce_only_flag = self.reduce_only.isChecked()
-            price = self.dom.model.price_colum_num[row]
+            price = self.dom.model.priceAt(row)
             offset = self.offset_box.value()
             offset_type = 'tick' if self.tick_dollar.isChecked() else 'percent'
             stop_type = self.getStopType(self.selected_stop_mode)
@@ -462,9 +476,8 @@ class DomWindow(MainWindow):
     def cancelOrder(self, index):
         if self.private_active:
             row, column = index.row(), index.column()
-            price = self.dom.model.price_colum_num[row]
             order_dict = self.threadsPrivate[0].aggregated_order_dict
-            self.execution.cancelPriceOrders(self.contract, row, column, price, order_dict)
+            self.execution.cancelPriceOrders(self.contract, row, column, self.dom.model.tickAt(row), order_dict)
             self.setFocus()
             self.threadsPrivate[0].refreshTriggers()
 
@@ -517,13 +530,9 @@ class DomWindow(MainWindow):
         change the model based on new aggregation
         """
         choice = self.getCurrentTickSize()
-        # length = self.dom.model.default_length
-        self.dom.model.default_length = self.dom.model.DefaultLength(self.dom.last_trade, choice)
         self.dom.multiplier = 1 / choice
-
-        prices = self.dom.model.setPriceColumn(tick_size=choice, length=self.dom.model.default_length)
-        self.dom.model.tick = choice
-        self.dom.current_index = self.dom.model.default_length - int(self.dom.last_trade * self.dom.multiplier)
+        self.dom.model.setAggregation(choice, self.dom.last_trade)
+        self.dom.current_index = self.dom.model.priceRow(self.dom.last_trade)
         self.dom.threadsPublic[0].changeAggregation(choice)
         # need to send the order info again so it can be redisplayed at different table position
         if self.keysAreValid():
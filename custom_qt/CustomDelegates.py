@@ -4,9 +4,85 @@ import PyQt5.QtCore
 import PyQt5.Qt
 
 import bisect
+from functools import lru_cache
 from app_styles.AppStyles import quote_board_colors
+from custom_qt.CustomModels import FlashRole, TradeStyleRole
+
+class PaintCache:
+    """
+    Painting resources shared by every delegate. Colors, pens and fonts are created once per value and
+    images are rasterized once per cell size, so paint() does not allocate or touch the disk.
+    """
+    colors = {}
+    pens = {}
+    fonts = {}
+    pixmaps = {}
+
+    @classmethod
+    def color(cls, color, alpha=None):
+        key = (color, alpha)
+        if key not in cls.colors:
+            qcolor = PyQt5.QtGui.QColor(color)
+            if alpha is not None:
+                qcolor.setAlpha(alpha)
+            cls.colors[key] = qcolor
+        return cls.colors[key]
+
+    @classmethod
+    def pen(cls, color):
+        if color not in cls.pens:
+            cls.pens[color] = PyQt5.QtGui.QPen(cls.color(color))
+        return cls.pens[color]
+
+    @classmethod
+    def font(cls, bold=False, point_size=None):
+        key = (bold, point_size)
+        if key not in cls.fonts:
+            font = PyQt5.QtGui.QFont()
+            font.setBold(bold)
+            if point_size:
+                font.setPointSize(point_size)
+            cls.fonts[key] = font
+        return cls.fonts[key]
+
+    @classmethod
+    def pixmap(cls, path, width, height):
+        """
+        image at path rasterized at width x height
+        """
+        key = (path, width, height)
+        if key not in cls.pixmaps:
+            image = PyQt5.QtGui.QImage(path)
+            if not image.isNull():
+                image = image.scaled(width, height, PyQt5.QtCore.Qt.IgnoreAspectRatio,
+                                     PyQt5.QtCore.Qt.SmoothTransformation)
+            cls.pixmaps[key] = PyQt5.QtGui.QPixmap.fromImage(image)
+        return cls.pixmaps[key]
+
+
+flash_colors = {direction: PaintCache.color(*quote_board_colors['flash'][name])
+                for direction, name in [(1, 'up'), (-1, 'down'), (2, 'changed')]}
+
+
+def paintFlash(painter, option, index):
+    """
+    overlay the flash color on a quote board cell whose value just changed
+    """
+    direction = index.data(FlashRole)
+    if direction:
+        painter.fillRect(option.rect, flash_colors[direction])
+
+
+def paintEdge(painter, option):
+    """
+    color the bottom horizontal gridline of a quote board cell
+    """
+    painter.setPen(PaintCache.pen('#76458a'))
+    rect = option.rect
+    painter.drawLine(rect.left() - 1, rect.bottom(), rect.right() + 1, rect.bottom())
 
 
+@lru_cache(maxsize=4096)
 def number_string_threshold(number):
     """
      usage LastQuoteBoardDelegate to handle large numbers for market cap formulas etc
@@ -23,6 +99,7 @@ def number_string_threshold(number):
     suffix = ['','M', 'B', 'T', 'P'][magnitude]
     return f'{number: ,.2f} {suffix}'
 
+@lru_cache(maxsize=4096)
 def number_string(number):
     magnitude = 0
     while abs(number) >= 1_000:
@@ -32,14 +109,31 @@ def number_string(number):
     suffix = ['','k','M', 'B', 'T', 'P'][magnitude]
     return f'{number: ,.0f} {suffix}'
 
+@lru_cache(maxsize=4096)
 def price_format(number):
     num_str = f'{number: ,}'
     return num_str[:-2] if num_str.endswith('.0') else num_str
 
+@lru_cache(maxsize=4096)
+def size_format(number):
+    """
+    order book and order sizes in the dom ladder
+    """
+    number = float(number)
+    if number > 9_999_999:
+        return f'{round(number / 1_000_000, 2)}M'
+    return f'{int(round(number, 0)):,}' if number > 2000 else f'{round(number, 2):,.2f}'
+
 class MarketQuoteBoardDelegate(PyQt5.QtWidgets.QStyledItemDelegate):
     """
     Manages the style for the first column in the quoteboard
     """
+    # row kind -> (background, text color)
+    styles = {'empty': ('#e6dfe6', PyQt5.QtCore.Qt.black),
+              'formula': ('#b2b8cf', '#eb2d6e'),
+              'heading': ('#FFFFFF', '#FF6600'),
+              'market': ('#cad7e0', PyQt5.QtCore.Qt.black)}
+
     def __init__(self, parent = None, defaultWidth = 160):
         super().__init__(parent)
         self.defaultWidth = defaultWidth
@@ -47,44 +141,21 @@ class MarketQuoteBoardDelegate(PyQt5.QtWidgets.QStyledItemDelegate):
     def paint(self, painter, option, index):
         item = index.data(PyQt5.QtCore.Qt.DisplayRole)
         item = '' if not item else item
-        rect =  PyQt5.QtCore.QRect(option.rect.x(), option.rect.y(), option.rect.width(), option.rect.height())
-
-        margin_color = PyQt5.QtGui.QColor('#cad7e0')
-        background_color = PyQt5.QtGui.QColor('#cad7e0')
-        painter.fillRect(option.rect, margin_color)
-
-        color = PyQt5.QtGui.QColor(background_color)
-        painter.setBrush(PyQt5.QtGui.QBrush(color))
-
         if item == '':
-            #no entry in the cell
-            background_color = PyQt5.QtGui.QColor('#e6dfe6')
-            painter.setPen(PyQt5.QtGui.QColor('#FF6600'))
-
-        if item.startswith('?'):
-            #special formula
-            background_color = PyQt5.QtGui.QColor('#b2b8cf')
-            painter.setPen(PyQt5.QtGui.QColor('#eb2d6e'))
+            kind = 'empty'
+        elif item.startswith('?'):
+            kind = 'formula' #special formula
         elif item.startswith('~'):
-            #section heading
-            background_color = PyQt5.QtGui.QColor('#FFFFFF')
-            painter.setPen(PyQt5.QtGui.QColor('#FF6600'))
+            kind = 'heading' #section heading
         else:
-            painter.setPen(PyQt5.QtCore.Qt.black)
-        painter.fillRect(option.rect, background_color)  # 9dd1d1 #3B4754
-
-        font = PyQt5.QtGui.QFont()
-        font.setBold(True)
-        painter.setFont(font)
-        painter.drawText(rect, PyQt5.QtCore.Qt.AlignCenter, str(item))
-
-        #color bottom horizontal gridline
+            kind = 'market'
+        background_color, text_color = self.styles[kind]
+        painter.fillRect(option.rect, PaintCache.color(background_color))  # 9dd1d1 #3B4754
 
-        edge_color = PyQt5.QtGui.QColor('#76458a')
-        painter.setPen(edge_color);
-        p1 = PyQt5.QtCore.QPoint(option.rect.bottomLeft().x() - 1, option.rect.bottomLeft().y());
-        p2 = PyQt5.QtCore.QPoint(option.rect.bottomRight().x() + 1, option.rect.bottomRight().y());
-        painter.drawLine(p1, p2);
+        painter.setPen(PaintCache.pen(text_color))
+        painter.setFont(PaintCache.font(bold=True))
+        painter.drawText(option.rect, PyQt5.QtCore.Qt.AlignCenter, str(item))
+        paintEdge(painter, option)
 
     def sizeHint(self, option, index):
         hint = PyQt5.QtWidgets.QStyledItemDelegate.sizeHint(self, option, index)
@@ -99,28 +170,23 @@ class LastQuoteBoardDelegate(PyQt5.QtWidgets.QStyledItemDelegate):
     def __init__(self, parent=None):
         super().__init__(parent)
 
-    def paint(self, painter, option, index):
-        item = index.data(PyQt5.QtCore.Qt.DisplayRole)
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def label(item):
+        if item in ['-', 0, '', '0', '0.0', None]:
+            return ''
+        return number_string_threshold(float(item))
 
-        painter.setPen(PyQt5.QtCore.Qt.black)
-        font = PyQt5.QtGui.QFont()
-        font.setBold(True)
-        painter.setFont(font)
+    def paint(self, painter, option, index):
+        item = self.label(index.data(PyQt5.QtCore.Qt.DisplayRole))
 
-        default_color = PyQt5.QtGui.QColor('#FFFFFF')
-        if item not in ['-',0, '', '0', '0.0']:
-            item = number_string_threshold(float(item))
-            painter.fillRect(option.rect, default_color)  # 183666
-        else:
-            item = ''
-            painter.fillRect(option.rect, PyQt5.QtCore.Qt.white)
+        painter.fillRect(option.rect, PaintCache.color('#FFFFFF'))  # 183666
+        paintFlash(painter, option, index)
 
-        painter.drawText(option.rect, PyQt5.QtCore.Qt.AlignCenter, str(item))
-        edge_color = PyQt5.QtGui.QColor('#76458a')
-        painter.setPen(edge_color);
-        p1 = PyQt5.QtCore.QPoint(option.rect.bottomLeft().x() - 1, option.rect.bottomLeft().y());
-        p2 = PyQt5.QtCore.QPoint(option.rect.bottomRight().x() + 1, option.rect.bottomRight().y());
-        painter.drawLine(p1, p2);
+        painter.setPen(PaintCache.pen(PyQt5.QtCore.Qt.black))
+        painter.setFont(PaintCache.font(bold=True))
+        painter.drawText(option.rect, PyQt5.QtCore.Qt.AlignCenter, item)
+        paintEdge(painter, option)
 
 class BasisQuoteBoardDelegate(PyQt5.QtWidgets.QStyledItemDelegate):
     """
@@ -140,40 +206,36 @@ class BasisQuoteBoardDelegate(PyQt5.QtWidgets.QStyledItemDelegate):
                 self.color_settings[i]['color'].append(settings[0])
                 self.color_settings[i]['vals'].append(abs(settings[1])) #convert negative to positive for use in bisect function
                 self.color_settings[i]['font_color'].append(settings[2])
+        self.style = lru_cache(maxsize=4096)(self.style)
+
+    def style(self, item):
+        """
+        (text, background, text color) of a cell value
+        """
+        if item in ['-', 0, '0', '0.0']:
+            return '', '#ffffff', PyQt5.QtCore.Qt.black
+        val = float(item)
+        side = 'negative' if val < 0 else 'positive'
+        sign = '+' if val > 0 else ''
+        a = self.color_settings[side]['vals']
+        val_index = bisect.bisect(a, abs(val)) - 1 #abs(val) as negative vals are now positive
+        color = self.color_settings[side]['color'][val_index]
+        text_color = self.color_settings[side]['font_color'][val_index]
+        return f'{sign}{round(val * 100, 2)}%', color, text_color
 
     def paint(self, painter, option, index):
         item = index.data(PyQt5.QtCore.Qt.DisplayRole)
 
-        font = PyQt5.QtGui.QFont()
-        font.setBold(True)
-        painter.setFont(font)
-        blank_color = PyQt5.QtGui.QColor('#ffffff')
         if item:
-            if item not in ['-', 0, '0', '0.0']:
-                val = float(item)
-                side = 'negative' if val < 0 else 'positive'
-                sign = '+' if val > 0 else ''
-                a = self.color_settings[side]['vals']
-                val_index = bisect.bisect(a, abs(val)) - 1 #abs(val) as negative vals are now positive
-                color = self.color_settings[side]['color'][val_index]
-                text_color = self.color_settings[side]['font_color'][val_index]
-                item = f'{sign}{round(val * 100, 2)}%'
-            else:
-                item = ''
-                color = blank_color
-                text_color = PyQt5.QtCore.Qt.black
-            painter.setPen(PyQt5.QtGui.QColor(text_color))
-            painter.fillRect(option.rect, PyQt5.QtGui.QColor(color))
+            item, color, text_color = self.style(item)
+            painter.fillRect(option.rect, PaintCache.color(color))
+            paintFlash(painter, option, index)
+            painter.setPen(PaintCache.pen(text_color))
+            painter.setFont(PaintCache.font(bold=True))
             painter.drawText(option.rect, PyQt5.QtCore.Qt.AlignCenter, item)
         else:
-            painter.fillRect(option.rect, PyQt5.QtGui.QColor(PyQt5.QtCore.Qt.white))
-            painter.drawText(option.rect, PyQt5.QtCore.Qt.AlignCenter, '')
-
-        edge_color = PyQt5.QtGui.QColor('#76458a')
-        painter.setPen(edge_color)
-        p1 = PyQt5.QtCore.QPoint(option.rect.bottomLeft().x() - 1, option.rect.bottomLeft().y())
-        p2 = PyQt5.QtCore.QPoint(option.rect.bottomRight().x() + 1, option.rect.bottomRight().y())
-        painter.drawLine(p1, p2);
+            painter.fillRect(option.rect, PaintCache.color(PyQt5.QtCore.Qt.white))
+        paintEdge(painter, option)
 
     def sizeHint(self, option, index):
         hint = PyQt5.QtWidgets.QStyledItemDelegate.sizeHint(self, option, index)
@@ -189,56 +251,46 @@ class MarginQuoteBoardDelegate(PyQt5.QtWidgets.QStyledItemDelegate):
         super().__init__(parent)
         self.defaultWidth = 65
 
-    def paint(self, painter, option, index):
-        item = index.data(PyQt5.QtCore.Qt.DisplayRole)
-        font = PyQt5.QtGui.QFont()
-        font.setBold(True)
-        painter.setFont(font)
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def style(item):
+        """
+        (text, background, text color) of a cell value
+        """
         default = '#e6dddc'
         text_color = PyQt5.QtCore.Qt.black
-        blank_color = PyQt5.QtGui.QColor('#FFFFFF')
-
-        if item:
-            if item != '-':
-                val = float(item)
-                if val == 0:
-                    sign = ''
-                    item = '-'
-                    color = default
-                    text_color = PyQt5.QtCore.Qt.black
-                else:
-                    sign = '+'
-                    if val >= 0.1:
-                        color = '#00ffa2'
-                        text_color = PyQt5.QtCore.Qt.white
-                        font.setBold(True)
-                    elif val >= 0.075:
-                        color = '#05BD7A'
-                    elif val >= 0.05:
-                        color = '#a4dec9'
-                    elif val >= 0.025:
-                        color = '#bfded3'
-                    else:
-                        color = '#c8dbd4'
-
-                item = f'{sign}{round(val * 100, 2)}%'
-            else:
-                color = default
-                text_color = PyQt5.QtCore.Qt.black
-            painter.setPen(text_color)
-            painter.fillRect(option.rect, PyQt5.QtGui.QColor(color))
-            painter.drawText(option.rect, PyQt5.QtCore.Qt.AlignCenter, item)
+        if item == '-':
+            return item, default, text_color
+        val = float(item)
+        if val == 0:
+            return '-', default, text_color
+        if val >= 0.1:
+            color = '#00ffa2'
+            text_color = PyQt5.QtCore.Qt.white
+        elif val >= 0.075:
+            color = '#05BD7A'
+        elif val >= 0.05:
+            color = '#a4dec9'
+        elif val >= 0.025:
+            color = '#bfded3'
         else:
-            painter.setPen(text_color)
-            painter.fillRect(option.rect, blank_color)
-            painter.drawText(option.rect, PyQt5.QtCore.Qt.AlignCenter, '-')
+            color = '#c8dbd4'
+        return f'+{round(val * 100, 2)}%', color, text_color
 
+    def paint(self, painter, option, index):
+        item = index.data(PyQt5.QtCore.Qt.DisplayRole)
+        painter.setFont(PaintCache.font(bold=True))
 
-        edge_color = PyQt5.QtGui.QColor('#76458a')
-        painter.setPen(edge_color);
-        p1 = PyQt5.QtCore.QPoint(option.rect.bottomLeft().x() - 1, option.rect.bottomLeft().y());
-        p2 = PyQt5.QtCore.QPoint(option.rect.bottomRight().x() + 1, option.rect.bottomRight().y());
-        painter.drawLine(p1, p2);
+        if item:
+            item, color, text_color = self.style(item)
+            painter.fillRect(option.rect, PaintCache.color(color))
+            paintFlash(painter, option, index)
+        else:
+            item, text_color = '-', PyQt5.QtCore.Qt.black
+            painter.fillRect(option.rect, PaintCache.color('#FFFFFF'))
+        painter.setPen(PaintCache.pen(text_color))
+        painter.drawText(option.rect, PyQt5.QtCore.Qt.AlignCenter, item)
+        paintEdge(painter, option)
 
     def sizeHint(self, option, index):
         hint = PyQt5.QtWidgets.QStyledItemDelegate.sizeHint(self, option, index)
@@ -277,51 +329,42 @@ class ProgressDelegate(PyQt5.QtWidgets.QStyledItemDelegate):
     """
     This controls the trade volume bar sizes
     """
+    # upper volume bound of each bar length, bars are volume_props of the cell width
+    volume_bounds = [50_000, 200_000, 500_000, 1_000_000, 2_000_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000]
+    volume_props = [0.05, 0.1, 0.15, 0.25, 0.35, 0.45, 0.6, 0.75, 0.85, 0.95]
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def label(volume):
+        return f'{volume:,}'
 
     def paint(self, painter, option, index):
         volume = index.data(PyQt5.QtCore.Qt.DisplayRole)
         if not volume:
             return
         volume = int(volume)
-        if volume <= 50_000:
-            volume_prop = 0.05
-        elif volume <= 200_000:
-            volume_prop = 0.1
-        elif volume <= 500_000:
-            volume_prop = 0.15
-        elif volume <= 1_000_000:
-            volume_prop = 0.25
-        elif volume <= 2_000_000:
-            volume_prop = 0.35
-        elif volume <= 5_000_000:
-            volume_prop = 0.45
-        elif volume <= 10_000_000:
-            volume_prop = 0.6
-        elif volume <= 25_000_000:
-            volume_prop = 0.75
-        elif volume <= 50_000_000:
-            volume_prop = 0.85
-        else:
-            volume_prop = 0.95
-        opt = PyQt5.QtWidgets.QStyleOptionProgressBar()
+        volume_prop = self.volume_props[bisect.bisect_left(self.volume_bounds, volume)]
 
-        progress = volume_prop * 100
         # # draw the progress bar
-        painter.setBrush(PyQt5.QtGui.QColor('#facdf4'))
-        painter.setPen(PyQt5.QtGui.QColor('#facdf4'))
-        progress_bar = PyQt5.QtCore.QRect(option.rect.x(), option.rect.y(),
-                                          int((option.rect.width() * progress) / 100),
+        painter.setBrush(PaintCache.color('#facdf4'))
+        painter.setPen(PaintCache.pen('#facdf4'))
+        progress_bar = PyQt5.QtCore.QRect(option.rect.x(), option.rect.y(), int(option.rect.width() * volume_prop),
                                           option.rect.height())
         painter.drawRect(progress_bar)
-        # draw the background and text
-        background_rect = PyQt5.QtCore.QRect(option.rect.x(), option.rect.y(), option.rect.width(),
-                                             option.rect.height())
-        painter.setBrush(PyQt5.QtGui.QColor('#facdf4'))
-        painter.setPen(PyQt5.QtGui.QColor('#000000'))
-        painter.drawText(background_rect, PyQt5.QtCore.Qt.AlignRight, f'{volume:,}')
+        # draw the text
+        painter.setPen(PaintCache.pen('#000000'))
+        painter.drawText(option.rect, PyQt5.QtCore.Qt.AlignRight, self.label(volume))
 
 
 class ItemDelegate(PyQt5.QtWidgets.QItemDelegate):
+    # column -> (background with size, background without, text color)
+    column_colors = {1: ('#05BD7A', '#bfded3', PyQt5.QtCore.Qt.white),
+                     2: ('#cad7e0', '#cad7e0', PyQt5.QtCore.Qt.black),
+                     3: ('#FF3A66', '#F4DBE1', PyQt5.QtCore.Qt.white)}
+    default_colors = ('#FFFFFF', '#FFFFFF', PyQt5.QtCore.Qt.black)
+    order_images = {0: 'assets/money_bag2.svg'}  # order_type -> image, anything else is a trigger order
+    trigger_image = 'assets/stop.svg'
+
     def __init__(self, parent):
         PyQt5.QtWidgets.QItemDelegate.__init__(self, parent)
         self.parent = parent
@@ -333,51 +376,29 @@ class ItemDelegate(PyQt5.QtWidgets.QItemDelegate):
         item = index.data(PyQt5.QtCore.Qt.DisplayRole)
         if type(item) == list:
             item, order_type = item  # returns [order quantity, order_type]
-        if index.column() == 1:
-            hex_code = '#05BD7A' if item else '#bfded3'
-            painter.setPen(PyQt5.QtCore.Qt.white)
-        elif index.column() == 2:
-            hex_code = '#cad7e0'
-            painter.setPen(PyQt5.QtGui.QPen(PyQt5.QtCore.Qt.black))
-        elif index.column() == 3:
-            hex_code = '#FF3A66' if item else '#F4DBE1'
-            painter.setPen(PyQt5.QtGui.QPen(PyQt5.QtCore.Qt.white))
-        else:
-            hex_code = '#FFFFFF'
-            painter.setPen(PyQt5.QtGui.QPen(PyQt5.QtCore.Qt.black))
-        color = PyQt5.QtGui.QColor(hex_code)
-        painter.fillRect(option.rect, color)
+        column = index.column()
+        filled, empty, text_color = self.column_colors.get(column, self.default_colors)
+        painter.fillRect(option.rect, PaintCache.color(filled if item else empty))
+        painter.setPen(PaintCache.pen(text_color))
 
-        # set text color
         # set text formatting
         if item:
             # dim adds some buffer to the edge of the cell
-            if index.column() == 1:
+            if column == 1:
                 alignment = PyQt5.QtCore.Qt.AlignRight
-                item = float(item)
-                if item > 9_999_999:
-                    item = f'{round(item / 1_000_000, 2)}M'
-                else:
-                    item = f'{int(round(item, 0)):,}' if item > 2000 else f'{round(item, 2):,.2f}'
+                item = size_format(item)
                 dim = -3
-            elif index.column() == 3:
+            elif column == 3:
                 alignment = PyQt5.QtCore.Qt.AlignLeft
-                item = float(item)
-                if item > 9_999_999:
-                    item = f'{round(item / 1_000_000, 2)}M'
-                else:
-                    item = f'{int(round(item, 0)):,}' if item > 2000 else f'{round(item, 2):,.2f}'
+                item = size_format(item)
                 dim = -3
-            elif index.column() in [0, 4]:
+            elif column in [0, 4]:
                 alignment = PyQt5.QtCore.Qt.AlignLeft
-                image_name = 'assets/money_bag2.svg' if order_type == 0 else 'assets/stop.svg'
-                image = PyQt5.QtGui.QImage(image_name)
-                # image = PyQt5.QtGui.QImage('assets/elvis.png')
-                pixmap = PyQt5.QtGui.QPixmap.fromImage(image)
-                pixmap.scaled(50, 40, PyQt5.QtCore.Qt.KeepAspectRatio)
+                image_name = self.order_images.get(order_type, self.trigger_image)
                 pic_rect = PyQt5.QtCore.QRect(option.rect.x() + 40, option.rect.y() + 2, int(option.rect.width() * .3),
                                               int(option.rect.height() * 0.7))
-                painter.drawPixmap(pic_rect, pixmap)
+                pixmap = PaintCache.pixmap(image_name, pic_rect.width(), pic_rect.height())
+                painter.drawPixmap(pic_rect.topLeft(), pixmap)
                 dim = -3
 
             else:
@@ -388,59 +409,64 @@ class ItemDelegate(PyQt5.QtWidgets.QItemDelegate):
             painter.drawText(text_rect, alignment, str(item))
 
 
-def StyleActivityCells(trade_data, col):
-    #TODO: put trade value brackets and colors in a config
+# trade value brackets of the activity window: (upper USD bound, font size, bold, buy/sell background, text color)
+activity_brackets = [(50_000, 8, False, ('#bfded3', '#F4DBE1'), '#000000'),
+                     (100_000, 10, False, ('#a4dec9', '#f0a3b5'), '#000000'),
+                     (200_000, 12, True, ('#05BD7A', '#FF3A66'), '#FFFFFF'),
+                     (float('inf'), 13, True, ('#00ffa2', '#ff1f51'), '#FFFFFF')]
+
+
+def activityStyleKey(trade_data):
     """
-    trade_data = [{'time' : [time],
-                         'market' : [market],
-                         'exchange' : [exchange],
-                         'USD' : [size_str, size],
-                         'side' : [side],
-                         'price' : [str(price), price],
-                         'type' : [trade_type]}
-                         ]
-    col is 'time', 'market', 'exchange', 'USD', 'side', 'price', or 'type'
+    style key of a trade for ActivityDelegate: (bracket, side, liquidation)
+    trade_data = {'time' : [time],
+                  'market' : [market],
+                  'exchange' : [exchange],
+                  'USD' : [size_str, size],
+                  'side' : [side],
+                  'price' : [str(price), price],
+                  'type' : [trade_type]}
     """
-    if col == 'price':
-        price_formatted = price_format(trade_data[col][-1])
-        cell = PyQt5.QtWidgets.QTableWidgetItem(price_formatted)  # [0] is the formatted version of data
-    else:
-        cell = PyQt5.QtWidgets.QTableWidgetItem(trade_data[col][0])
-    cell.setTextAlignment(PyQt5.QtCore.Qt.AlignCenter)
-    side = trade_data['side'][0]
-    if col == 'time':
-        cell.setBackground(PyQt5.QtGui.QBrush(PyQt5.QtGui.QColor('#cad7e0')))
-        cell.setForeground(PyQt5.QtGui.QBrush(PyQt5.QtGui.QColor(PyQt5.QtCore.Qt.black)))
-    else:
-        if side == 'BUY':
-            cell.setForeground(PyQt5.QtGui.QBrush(PyQt5.QtGui.QColor('#05BD7A')))
-        else:
-            cell.setForeground(PyQt5.QtGui.QBrush(PyQt5.QtGui.QColor('#FF3A66')))
-        font = PyQt5.QtGui.QFont()
-        if trade_data['USD'][-1] < 50_000:
-            font.setPointSize(8)
-            back_color = '#bfded3' if side == 'BUY' else '#F4DBE1'
-            text_color = '#000000'
-        elif trade_data['USD'][-1] < 100_000:
-            font.setPointSize(10)
-            back_color = '#a4dec9' if side == 'BUY' else '#f0a3b5'
-            text_color = '#000000'
-        elif trade_data['USD'][-1] < 200_000:
-            font.setPointSize(12)
-            back_color = '#05BD7A' if side == 'BUY' else '#FF3A66'
-            text_color = '#FFFFFF'
-            font.setBold(True)
-        else:
-            text_color = '#FFFFFF'
-            back_color = '#00ffa2' if side == 'BUY' else '#ff1f51'
-            font.setPointSize(13)
-            font.setBold(True)
-        if trade_data['type'][0] == 'liq':
-            back_color = '#364b70'
-            text_color = '#05BD7A' if side == 'BUY' else '#FF3A66'
-            font.setPointSize(14)
-            font.setBold(True)
-        cell.setFont(font)
-        cell.setBackground(PyQt5.QtGui.QBrush(PyQt5.QtGui.QColor(back_color)))
-        cell.setForeground(PyQt5.QtGui.QBrush(PyQt5.QtGui.QColor(text_color)))
-    return cell
+    size = trade_data['USD'][-1]
+    bracket = next(i for i, (bound, *_) in enumerate(activity_brackets) if size < bound)
+    return bracket, trade_data['side'][0], trade_data['type'][0] == 'liq'
+
+
+class ActivityDelegate(PyQt5.QtWidgets.QStyledItemDelegate):
+    """
+    Styles the activity window rows by trade size and side, font and brushes are built once per style key
+    """
+    def __init__(self, parent=None, time_column=0):
+        super().__init__(parent)
+        self.time_column = time_column
+        self.styles = {}
+
+    def style(self, key, is_time):
+        if (key, is_time) not in self.styles:
+            bracket, side, liquidation = key
+            font = PyQt5.QtGui.QFont()
+            if is_time:
+                back_color, text_color = '#cad7e0', '#000000'
+            else:
+                _, size, bold, back_colors, text_color = activity_brackets[bracket]
+                back_color = back_colors[0] if side == 'BUY' else back_colors[1]
+                if liquidation:
+                    back_color = '#364b70'
+                    text_color = '#05BD7A' if side == 'BUY' else '#FF3A66'
+                    size, bold = 14, True
+                font.setPointSize(size)
+                font.setBold(bold)
+            self.styles[(key, is_time)] = (font, PyQt5.QtGui.QBrush(PyQt5.QtGui.QColor(back_color)),
+                                           PyQt5.QtGui.QBrush(PyQt5.QtGui.QColor(text_color)))
+        return self.styles[(key, is_time)]
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        option.displayAlignment = PyQt5.QtCore.Qt.AlignCenter
+        key = index.data(TradeStyleRole)
+        if key is None:
+            return
+        font, background, foreground = self.style(key, index.column() == self.time_column)
+        option.font = font
+        option.backgroundBrush = background
+        option.palette.setBrush(PyQt5.QtGui.QPalette.Text, foreground)
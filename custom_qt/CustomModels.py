@@ -5,11 +5,23 @@ import PyQt5.Qt
 
 import pandas as pd
 import numpy as np
-import math
-import decimal
 from collections import defaultdict
+from functools import lru_cache
 
 from utils.utilfunc import rec_dd
+from utils.TickQuantizer import TickQuantizer
+
+# direction of the last change of a cell while it is flashing: 1 up, -1 down, 2 changed (not numeric), 0 none
+FlashRole = PyQt5.QtCore.Qt.UserRole + 1002
+# style key of a trade tape row, see TradeTapeModel
+TradeStyleRole = PyQt5.QtCore.Qt.UserRole + 1003
+
+
+def changeDirection(old, new):
+    try:
+        return 1 if float(new) > float(old) else -1 if float(new) < float(old) else 2
+    except (TypeError, ValueError):
+        return 2
 
 
 class PandasModel(PyQt5.QtCore.QAbstractTableModel):
@@ -206,17 +218,410 @@ class DataFrameModel(PyQt5.QtCore.QAbstractTableModel):
         except Exception as e:
             print(e)
 
+class RenderScheduler(PyQt5.QtCore.QObject):
+    """
+    Collects dirty (row, column) cells of a model and flushes them as a few merged dataChanged ranges,
+    at most refresh_rate times a second. The timer only runs while there is something to flush.
+    """
+
+    def __init__(self, model, refresh_rate=60, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.interval = int(1000 / refresh_rate)
+        self.dirty = defaultdict(set)  # column -> set of rows
+        self.last_flush = PyQt5.QtCore.QElapsedTimer()
+        self.last_flush.start()
+        self.timer = PyQt5.QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def markDirty(self, rows, column):
+        self.dirty[column].update(rows)
+        if not self.timer.isActive():
+            self.timer.start(max(self.interval - self.last_flush.elapsed(), 0))
+
+    def markRange(self, first_row, last_row, column):
+        self.markDirty(range(first_row, last_row + 1), column)
+
+    @staticmethod
+    def contiguous(rows):
+        """
+        merge a set of rows into sorted (first, last) runs
+        """
+        runs = []
+        for row in sorted(rows):
+            if runs and row == runs[-1][1] + 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        return [tuple(run) for run in runs]
+
+    def regions(self):
+        """
+        dirty cells as (first_row, last_row, first_column, last_column) rectangles, adjacent columns with the
+        same row runs are emitted together
+        """
+        row_count = self.model.rowCount()
+        regions = []
+        for column in sorted(self.dirty):
+            rows = [row for row in self.dirty[column] if 0 <= row < row_count]
+            for first, last in self.contiguous(rows):
+                for region in regions:
+                    if region[:2] == [first, last] and region[3] == column - 1:
+                        region[3] = column
+                        break
+                else:
+                    regions.append([first, last, column, column])
+        return regions
+
+    def flush(self):
+        regions = self.regions()
+        self.dirty = defaultdict(set)
+        self.last_flush.restart()
+        for first_row, last_row, first_column, last_column in regions:
+            self.model.dataChanged.emit(self.model.index(first_row, first_column),
+                                        self.model.index(last_row, last_column))
+
+    def clear(self):
+        self.dirty = defaultdict(set)
+        self.timer.stop()
+
+
+class RecordTableModel(PyQt5.QtCore.QAbstractTableModel):
+    """
+    Model for the account tables fed with DataManager.RecordTable.
+    Values are held in a preallocated object array, setRecords() only writes and repaints the rows whose
+    values changed and inserts/removes rows at the end. The model is only reset when the columns change.
+    """
+    ValueRole = PyQt5.QtCore.Qt.UserRole + 1001
+
+    def __init__(self, table=None, parent=None, capacity=64):
+        super().__init__(parent)
+        self._columns = []
+        self._values = np.empty((capacity, 0), dtype=object)
+        self._rows = 0
+        if table is not None:
+            self.setRecords(table)
+
+    def _reserve(self, rows, columns):
+        capacity, width = self._values.shape
+        if rows > capacity or columns != width:
+            values = np.empty((max(rows, 2 * capacity), columns), dtype=object)
+            if columns == width:
+                values[:self._rows] = self._values[:self._rows]
+            self._values = values
+
+    def setRecords(self, table):
+        rows = table.rows
+        if table.columns != self._columns:
+            self.beginResetModel()
+            self._columns = list(table.columns)
+            self._rows = 0
+            self._reserve(len(rows), len(self._columns))
+            for i, row in enumerate(rows):
+                self._values[i] = row
+            self._rows = len(rows)
+            self.endResetModel()
+            return
+
+        self._reserve(len(rows), len(self._columns))
+        shared = min(self._rows, len(rows))
+        changed = []
+        for i in range(shared):
+            if tuple(self._values[i]) != rows[i]:
+                self._values[i] = rows[i]
+                changed.append(i)
+
+        if len(rows) > self._rows:
+            self.beginInsertRows(PyQt5.QtCore.QModelIndex(), self._rows, len(rows) - 1)
+            for i in range(self._rows, len(rows)):
+                self._values[i] = rows[i]
+            self._rows = len(rows)
+            self.endInsertRows()
+        elif len(rows) < self._rows:
+            self.beginRemoveRows(PyQt5.QtCore.QModelIndex(), len(rows), self._rows - 1)
+            self._values[len(rows):self._rows] = None
+            self._rows = len(rows)
+            self.endRemoveRows()
+
+        for first, last in RenderScheduler.contiguous(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self._columns) - 1))
+
+    def columns(self):
+        return list(self._columns)
+
+    def headerData(self, section, orientation, role=PyQt5.QtCore.Qt.DisplayRole):
+        if role == PyQt5.QtCore.Qt.DisplayRole:
+            if orientation == PyQt5.QtCore.Qt.Horizontal:
+                return self._columns[section] if section < len(self._columns) else None
+            return section
+        return None
+
+    def rowCount(self, parent=PyQt5.QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._rows
+
+    def columnCount(self, parent=PyQt5.QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._columns)
+
+    def data(self, index, role=PyQt5.QtCore.Qt.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < self._rows and 0 <= index.column() < len(self._columns)):
+            return None
+        val = self._values[index.row(), index.column()]
+        if role == PyQt5.QtCore.Qt.DisplayRole:
+            return PyQt5.QtCore.QVariant(val)
+        elif role == RecordTableModel.ValueRole:
+            return val
+        return None
+
+    def flags(self, index):
+        return PyQt5.QtCore.Qt.ItemIsSelectable | PyQt5.QtCore.Qt.ItemIsEnabled
+
+
+class QuoteTableModel(PyQt5.QtCore.QAbstractTableModel):
+    """
+    Columnar model for the master quote board. setTable() diffs each column against the previous
+    snapshot with numpy and emits dataChanged only for the cells that changed. Changed cells report
+    their direction through FlashRole for flash_ms, the model is only reset when the markets change.
+    """
+    ValueRole = PyQt5.QtCore.Qt.UserRole + 1001
+
+    def __init__(self, columns, mapping=None, key='name', flash_ms=600, parent=None):
+        super().__init__(parent)
+        self._columns = list(columns)
+        self.mapping = mapping
+        self.key = key
+        self.flash_ms = flash_ms
+        self._keys = np.array([], dtype=object)
+        self._values = [np.array([], dtype=object) for _ in self._columns]
+        self._flash = np.zeros((0, len(self._columns)), dtype=np.int8)
+        self._flash_until = np.zeros((0, len(self._columns)))
+        self.clock = PyQt5.QtCore.QElapsedTimer()
+        self.clock.start()
+        self.flash_timer = PyQt5.QtCore.QTimer(self)
+        self.flash_timer.setSingleShot(True)
+        self.flash_timer.timeout.connect(self.expireFlashes)
+
+    def setTable(self, df):
+        keys = df[self.key].to_numpy(dtype=object)
+        values = [df[column].to_numpy() for column in self._columns]
+        if len(keys) != len(self._keys) or not np.array_equal(keys, self._keys):
+            self.beginResetModel()
+            self._keys = keys
+            self._values = values
+            self._flash = np.zeros((len(keys), len(self._columns)), dtype=np.int8)
+            self._flash_until = np.zeros((len(keys), len(self._columns)))
+            self.endResetModel()
+            return
+
+        now = self.clock.elapsed()
+        for column, (old, new) in enumerate(zip(self._values, values)):
+            changed = np.flatnonzero(old != new)
+            if not len(changed):
+                continue
+            if self.flash_ms:
+                if old.dtype.kind in 'fiu' and new.dtype.kind in 'fiu':
+                    self._flash[changed, column] = np.where(new[changed] > old[changed], 1, -1)
+                else:
+                    self._flash[changed, column] = [changeDirection(old[row], new[row]) for row in changed]
+                self._flash_until[changed, column] = now + self.flash_ms
+            self._values[column] = new
+            for first, last in RenderScheduler.contiguous(changed.tolist()):
+                self.dataChanged.emit(self.index(first, column), self.index(last, column))
+        self.scheduleFlashExpiry()
+
+    def scheduleFlashExpiry(self):
+        flashing = self._flash_until[self._flash != 0]
+        if len(flashing) and not self.flash_timer.isActive():
+            self.flash_timer.start(max(int(flashing.min() - self.clock.elapsed()), 0))
+
+    def expireFlashes(self):
+        expired = (self._flash != 0) & (self._flash_until <= self.clock.elapsed())
+        rows, columns = np.nonzero(expired)
+        self._flash[expired] = 0
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            self.dataChanged.emit(self.index(row, column), self.index(row, column), [FlashRole])
+        self.scheduleFlashExpiry()
+
+    def headerData(self, section, orientation, role=PyQt5.QtCore.Qt.DisplayRole):
+        if role == PyQt5.QtCore.Qt.DisplayRole:
+            if orientation == PyQt5.QtCore.Qt.Horizontal:
+                column = self._columns[section]
+                return self.mapping[column] if self.mapping else column
+            return section
+        return None
+
+    def rowCount(self, parent=PyQt5.QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._keys)
+
+    def columnCount(self, parent=PyQt5.QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._columns)
+
+    def data(self, index, role=PyQt5.QtCore.Qt.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self._keys)):
+            return None
+        if role == FlashRole:
+            return int(self._flash[index.row(), index.column()])
+        val = self._values[index.column()][index.row()]
+        val = val.item() if isinstance(val, np.generic) else val
+        if role == PyQt5.QtCore.Qt.DisplayRole:
+            return PyQt5.QtCore.QVariant(val)
+        elif role == QuoteTableModel.ValueRole:
+            return val
+        return None
+
+    def flags(self, index):
+        return PyQt5.QtCore.Qt.ItemIsSelectable | PyQt5.QtCore.Qt.ItemIsEnabled
+
+
+class TradeTapeModel(PyQt5.QtCore.QAbstractTableModel):
+    """
+    Fixed capacity ring buffer of trades for the activity window. append() only queues trades, they are
+    added as one row insert per frame and the oldest rows are dropped once capacity is reached.
+    Each row keeps its display strings and a style key from style_key(trade), read through TradeStyleRole.
+    """
+
+    def __init__(self, columns, headers=None, capacity=5000, refresh_rate=60, formatters=None, style_key=None,
+                 parent=None):
+        super().__init__(parent)
+        self._columns = list(columns)
+        self.headers = list(headers) if headers else list(columns)
+        self.capacity = capacity
+        self.formatters = formatters if formatters else {}  # column -> function of the raw value
+        self.style_key = style_key
+        self._rows = [None] * capacity  # (texts, style key)
+        self._start = 0
+        self._count = 0
+        self.pending = []
+        self.timer = PyQt5.QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(int(1000 / refresh_rate))
+        self.timer.timeout.connect(self.flush)
+
+    def row(self, trade):
+        texts = tuple(self.formatters[column](trade[column][-1]) if column in self.formatters else trade[column][0]
+                      for column in self._columns)
+        return texts, self.style_key(trade) if self.style_key else None
+
+    def append(self, trades):
+        self.pending.extend(self.row(trade) for trade in trades)
+        if self.pending and not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        pending, self.pending = self.pending[-self.capacity:], []
+        if not pending:
+            return
+        drop = max(self._count + len(pending) - self.capacity, 0)
+        if drop:
+            self.beginRemoveRows(PyQt5.QtCore.QModelIndex(), 0, drop - 1)
+            for i in range(drop):
+                self._rows[(self._start + i) % self.capacity] = None
+            self._start = (self._start + drop) % self.capacity
+            self._count -= drop
+            self.endRemoveRows()
+        self.beginInsertRows(PyQt5.QtCore.QModelIndex(), self._count, self._count + len(pending) - 1)
+        for i, row in enumerate(pending, self._count):
+            self._rows[(self._start + i) % self.capacity] = row
+        self._count += len(pending)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = [None] * self.capacity
+        self._start = 0
+        self._count = 0
+        self.pending = []
+        self.endResetModel()
+
+    def headerData(self, section, orientation, role=PyQt5.QtCore.Qt.DisplayRole):
+        if role == PyQt5.QtCore.Qt.DisplayRole and orientation == PyQt5.QtCore.Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return None
+
+    def rowCount(self, parent=PyQt5.QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._count
+
+    def columnCount(self, parent=PyQt5.QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._columns)
+
+    def data(self, index, role=PyQt5.QtCore.Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < self._count:
+            return None
+        texts, style = self._rows[(self._start + index.row()) % self.capacity]
+        if role == PyQt5.QtCore.Qt.DisplayRole:
+            return texts[index.column()]
+        elif role == TradeStyleRole:
+            return style
+        return None
+
+    def flags(self, index):
+        return PyQt5.QtCore.Qt.ItemIsSelectable | PyQt5.QtCore.Qt.ItemIsEnabled
+
+
+class PriceAxis:
+    """
+    Virtual price column of a DOM ladder. Row r holds tick index top - r of the ladder grouping, rows run
+    from the top tick index down to the bottom one. Prices and labels are computed from the row on demand,
+    only the formatted labels of recently painted rows are cached.
+    """
+    LABEL_CACHE = 4096
+
+    def __init__(self, tick_size, top, bottom=0):
+        self.ticks = TickQuantizer(tick_size)
+        self.tick = self.ticks.tick
+        self.top = int(top)
+        self.bottom = max(int(bottom), 0)
+        self.label = lru_cache(maxsize=self.LABEL_CACHE)(self.ticks.label)
+
+    def __len__(self):
+        return self.top - self.bottom + 1
+
+    def tickIndex(self, row):
+        return self.top - row
+
+    def price(self, row):
+        return self.ticks.price(self.top - row)
+
+    def labelAt(self, row):
+        return self.label(self.top - row)
+
+    def row(self, price):
+        return self.top - self.ticks.index(price)
+
+    def rows(self, prices):
+        return self.top - self.ticks.indexes(prices)
+
+
 class TableModel(PyQt5.QtCore.QAbstractTableModel):
     ValueRole = PyQt5.QtCore.Qt.UserRole + 1001
 
-    def __init__(self, specs, length=100000, parent=None, launch_agg=None):
+    HEADROOM_ROWS = 5000 #rows opened either side of the last price
+    GROW_MARGIN = 500 #extend the table once a price is within this many rows of the top or bottom
+    GROW_ROWS = 5000
+
+    def __init__(self, specs, length=100000, parent=None, launch_agg=None, refresh_rate=60):
         super().__init__(parent)
         self.specs = specs
-
-        self.default_length = self.DefaultLength(specs['last_price'], launch_agg)
-        self.prices = self.setPriceColumn(self.tick, self.default_length)
-        self.book = np.array([[0, 0, 0], [0, 0, 0]])
-        self.volume_profile = defaultdict(float)
+        self.scheduler = RenderScheduler(self, refresh_rate=refresh_rate, parent=self)
+
+        self.axis = self.DefaultAxis(specs['last_price'], launch_agg)
+        # bid/ask sizes indexed by table row, aligned with the price axis
+        self.bid_sizes = np.zeros(len(self.axis))
+        self.ask_sizes = np.zeros(len(self.axis))
+        self.book_rows = np.array([], dtype=int)
+        self.volume_profile = {}  # axis tick index -> traded volume at the current grouping
         self.order_dict_mem = {'open_buys': rec_dd(),
                                'open_sells': rec_dd(),
                                'trigger_buys': rec_dd(),
@@ -227,35 +632,68 @@ class TableModel(PyQt5.QtCore.QAbstractTableModel):
         self.last_trade = specs['last']
         self.bests = [0, 0]
 
-    def setPriceColumn(self, tick_size, length):
-        rounding = abs(int(decimal.Decimal(str(tick_size)).as_tuple().exponent))
-        tick = round(float(tick_size), rounding)
-        price = tick * length
-        prices = []
-        self.price_colum_num = []
-        for i in range(length):
-            price = price - tick
-            prices.append(str.format('{0:.' + str(rounding) + 'f}', price))
-            self.price_colum_num.append(round(price, rounding))
-        prices[-1] = prices[-1].replace('-', '')
-        self.updatePriceColumn(prices)
-        return prices
-
-    def updatePriceColumn(self, prices):
-        self.prices = prices
-        for i in range(self.default_length):
-            self.dataChanged.emit(self.index(i, 2), self.index(i, 2))
-
-    def DefaultLength(self, price, launch_agg):
+    @property
+    def default_length(self):
+        return len(self.axis)
+
+    def DefaultAxis(self, price, launch_agg):
         """
-        table is opened with minimum 50% upward allowable market price due to performance.
-        TODO: make the table auto increase if the price gets close to the highest allowable price
+        table is opened with HEADROOM_ROWS either side of the price and grows as the market approaches an edge
         """
         self.tick = launch_agg if launch_agg else self.specs['tick_size']
-        rows_to_max_price = price / self.tick
-        # eg: logan vs mayweather has price 0.05, this rule makes the market only available to 0.075.
-        # put in a minimum value to handle this
-        return max(int(math.ceil(rows_to_max_price * 1.5)), 10000)
+        price_ix = int(round(price / self.tick))
+        return PriceAxis(self.tick, price_ix + self.HEADROOM_ROWS, price_ix - self.HEADROOM_ROWS)
+
+    def setAggregation(self, tick_size, price):
+        """
+        rebuild the price axis for a new grouping around price
+        """
+        self.beginResetModel()
+        self.axis = self.DefaultAxis(price, tick_size)
+        self.bid_sizes = np.zeros(len(self.axis))
+        self.ask_sizes = np.zeros(len(self.axis))
+        self.book_rows = np.array([], dtype=int)
+        self.volume_profile = {}
+        self.scheduler.clear()
+        self.endResetModel()
+
+    def growAbove(self, rows):
+        """
+        add rows above the top of the table, existing rows move down by rows
+        """
+        self.beginInsertRows(PyQt5.QtCore.QModelIndex(), 0, rows - 1)
+        self.axis.top += rows
+        self.bid_sizes = np.concatenate((np.zeros(rows), self.bid_sizes))
+        self.ask_sizes = np.concatenate((np.zeros(rows), self.ask_sizes))
+        self.book_rows = self.book_rows + rows
+        self.endInsertRows()
+
+    def growBelow(self, rows):
+        """
+        add rows below the bottom of the table, the axis stops at a price of 0
+        """
+        rows = min(rows, self.axis.bottom)
+        if rows <= 0:
+            return
+        first = len(self.axis)
+        self.beginInsertRows(PyQt5.QtCore.QModelIndex(), first, first + rows - 1)
+        self.axis.bottom -= rows
+        self.bid_sizes = np.concatenate((self.bid_sizes, np.zeros(rows)))
+        self.ask_sizes = np.concatenate((self.ask_sizes, np.zeros(rows)))
+        self.endInsertRows()
+
+    def ensureRow(self, price):
+        """
+        grow the table so price sits at least GROW_MARGIN rows inside it, returns the rows added above
+        """
+        row = self.priceRow(price)
+        added = 0
+        if row < self.GROW_MARGIN:
+            added = self.GROW_MARGIN - row + self.GROW_ROWS
+            self.growAbove(added)
+        elif row > len(self.axis) - 1 - self.GROW_MARGIN:
+            self.growBelow(row - (len(self.axis) - 1 - self.GROW_MARGIN) + self.GROW_ROWS)
+        return added
 
     def defaultify(self, d):
         if not isinstance(d, dict):
@@ -263,54 +701,61 @@ class TableModel(PyQt5.QtCore.QAbstractTableModel):
         return defaultdict(lambda: defaultdict(float), {k: self.defaultify(v) for k, v in d.items()})
 
     def rowCount(self, parent=PyQt5.QtCore.QModelIndex()):
-        return len(self.prices)
+        return len(self.axis)
 
     def columnCount(self, parent=PyQt5.QtCore.QModelIndex()):
         return 6
 
-    def updateBook(self, book):
-        # data = {'best' : [best ask, best bid], 'book': np.array(book)}
-        self.book = book['book']
-        best_ask, best_bid = book['best']
-        best_ask_ix = int(self.default_length - best_ask / self.tick)
-        best_bid_ix = int(self.default_length - best_bid / self.tick)
-        bid_mem, ask_mem = self.bests
-        # smarter refreshing
-        if best_ask == ask_mem and best_bid == bid_mem:
-            # prices are unchanged
-            for i in range(best_bid_ix, best_ask_ix + 30):
-                col1_start_index = self.index(i, 1)
-                col1_end_index = self.index(i, 1)
-                self.dataChanged.emit(col1_start_index, col1_end_index)
-            for i in range(best_ask_ix - 30, best_ask_ix):
-                col3_start_index = self.index(i, 3)
-                col3_end_index = self.index(i, 3)
-                self.dataChanged.emit(col3_start_index, col3_end_index)
-        else:
-            band = range(best_ask_ix - 30, best_bid_ix + 30)
-            for i in band:
-                col1_start_index = self.index(i, 1)
-                col1_end_index = self.index(i, 1)
-                self.dataChanged.emit(col1_start_index, col1_end_index)
-                col3_start_index = self.index(i, 3)
-                col3_end_index = self.index(i, 3)
-                self.dataChanged.emit(col3_start_index, col3_end_index)
-
-        self.bests = book['best']
+    def priceAt(self, row):
+        return self.axis.price(row)
+
+    def tickAt(self, row):
+        return self.axis.tickIndex(row)
+
+    def priceRow(self, price):
+        return self.axis.row(price)
+
+    def priceRows(self, prices):
+        return self.axis.rows(prices)
+
+    def updateBook(self, snapshots):
+        """
+        snapshots is the BookSnapshots of the feed, only the newest table is read and nothing when it was
+        already taken by an earlier signal
+        """
+        table = snapshots.take()
+        if table is None or table.grouping != self.axis.tick:
+            # nothing new, or grouped for the previous aggregation
+            return
+        book = table.book
+        rows = self.axis.top - table.ticks
+        in_table = (rows >= 0) & (rows < len(self.bid_sizes))
+        rows = rows[in_table]
+        # clear the levels of the previous book then write the new one, only those rows need a repaint
+        previous_rows = self.book_rows
+        self.bid_sizes[previous_rows] = 0
+        self.ask_sizes[previous_rows] = 0
+        self.bid_sizes[rows] = book[in_table, 0]
+        self.ask_sizes[rows] = book[in_table, 2]
+        self.book_rows = rows
+
+        changed = np.union1d(previous_rows, rows)
+        self.scheduler.markDirty(changed.tolist(), 1)
+        self.scheduler.markDirty(changed.tolist(), 3)
+        self.bests = table.best
 
     def updateVolumeProfile(self, data):
-        volume_profile, volume_diff, refresh_flag = data
+        grouping, buckets, volumes, refresh_flag = data
+        if grouping != self.tick:
+            # sent before the aggregation change reached the feed thread, a full profile follows
+            return
+        changed = buckets.tolist()
         if refresh_flag:
-            # when the tick size changes we need to refresh volumes at each price to account for the aggregation
-            self.beginResetModel()
-            self.volume_profile = volume_profile
-            self.endResetModel()
-        else:
-            self.volume_profile = volume_profile
-            # update only the diffs
-            for price, volume in volume_diff.items():
-                row_index = int(self.default_length - price / self.tick)
-                self.dataChanged.emit(self.index(row_index, 5), self.index(row_index, 5))
+            # the whole profile after a change in aggregation or a reset
+            changed += list(self.volume_profile)
+            self.volume_profile = {}
+        self.volume_profile.update(zip(buckets.tolist(), volumes.tolist()))
+        self.scheduler.markDirty([self.axis.top - tick_index for tick_index in changed], 5)
 
     def updateOrderFeed(self, open_order_dict):
         """
@@ -318,26 +763,21 @@ class TableModel(PyQt5.QtCore.QAbstractTableModel):
         """
         display_dict = {'buy': {}, 'sell': {}}
 
-        for price, values in open_order_dict.items():
+        for tick_index, values in open_order_dict.items():
             for order_type in ['open', 'trigger']:
                 if order_type not in values.keys():
                     continue
                 side = values[order_type]['side']
                 flag = 0 if order_type == 'open' else 1
-                display_dict[side][price] = [values[order_type]['quantity'], flag]
+                display_dict[side][tick_index] = [values[order_type]['quantity'], flag]
         display_dict['buy'] = self.defaultify(display_dict['buy'])
         display_dict['sell'] = self.defaultify(display_dict['sell'])
-        self.beginResetModel()
+        previous = self.order_dict
         self.order_dict = display_dict
-        self.endResetModel()
-        for side, column in [['buy', 1], ['sell', 4]]:
-            for price, volume in self.order_dict[side].items():
-                row_index = int(self.default_length - price / self.tick)
-                self.dataChanged.emit(self.index(row_index, column), self.index(row_index, column))
-
-        self.beginResetModel()
-        self.order_dict = display_dict
-        self.endResetModel()
+        # repaint the rows orders were removed from as well as the rows they are now at
+        for side, column in [['buy', 0], ['sell', 4]]:
+            tick_indexes = set(previous[side].keys()) | set(display_dict[side].keys())
+            self.scheduler.markDirty([self.axis.top - tick_index for tick_index in tick_indexes], column)
 
     def unifyOrderDict(self, order_dict_mem):
         """
@@ -352,29 +792,29 @@ class TableModel(PyQt5.QtCore.QAbstractTableModel):
         if not index.isValid():
             return
         if role == PyQt5.QtCore.Qt.DisplayRole:
-            if index.row() < 0 or index.row() >= len(self.prices):
+            if index.row() < 0 or index.row() >= len(self.axis):
                 return None
             if index.column() == 0:
-                volume_at_price = self.order_dict['buy'][self.price_colum_num[index.row()]]
+                volume_at_price = self.order_dict['buy'][self.tickAt(index.row())]
                 return volume_at_price
             if index.column() == 4:
-                volume_at_price = self.order_dict['sell'][self.price_colum_num[index.row()]]
+                volume_at_price = self.order_dict['sell'][self.tickAt(index.row())]
                 return volume_at_price
 
             if index.column() == 2:
-                return PyQt5.QtCore.QVariant(str(self.prices[index.row()]))
+                return PyQt5.QtCore.QVariant(self.axis.labelAt(index.row()))
+
+            if index.column() == 1:
+                vol = self.bid_sizes[index.row()]
+                return float(vol) if vol else None
 
-            if index.column() in [1, 3]:
-                row_price = self.price_colum_num[index.row()]
-                if row_price in self.book[:, 1]:
-                    idx = np.where(self.book[:, 1] == row_price)[0][0]
-                    vol = self.book[idx, index.column() - 1]
-                    return vol
+            if index.column() == 3:
+                vol = self.ask_sizes[index.row()]
+                return float(vol) if vol else None
 
             if index.column() == 5:
-                volume = self.volume_profile[self.price_colum_num[index.row()]]
-                price = self.price_colum_num[index.row()]
-                return int(round(price * volume, 0))
+                volume = self.volume_profile.get(self.tickAt(index.row()))
+                return int(round(self.priceAt(index.row()) * volume, 0)) if volume else 0
 
         return None
 
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Special formulas for the quote board, eg: ?[FTX:BTC-PERP]/[FTX:ETH-PERP] or ?([FTX:BTC-PERP]-[FTX:BTC-0625])*100
+"""
+
+import ast
+import re
+
+
+class Formula:
+    """
+    A quote board formula parsed once into a compiled expression.
+    Each [market] reference becomes a variable holding that market's value of column.
+    """
+    REFERENCE = re.compile(r'\[([^\]]*)\]')
+    NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+             ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.UAdd, ast.USub)
+
+    def __init__(self, text, column='last'):
+        self.text = text
+        self.column = column
+        self.markets = {}  # variable -> market
+
+        def variable(match):
+            market = match.group(1).strip().replace('FTX:', '')
+            name = f'm{len(self.markets)}'
+            self.markets[name] = market
+            return name
+
+        expression = self.REFERENCE.sub(variable, text.lstrip('?'))
+        tree = ast.parse(expression, mode='eval')
+        for node in ast.walk(tree):
+            if not isinstance(node, self.NODES):
+                raise ValueError(f'{type(node).__name__} is not allowed in formula {text}')
+            if isinstance(node, ast.Name) and node.id not in self.markets:
+                raise ValueError(f'unknown name {node.id} in formula {text}')
+            if isinstance(node, ast.Constant):
+                if type(node.value) not in (int, float):
+                    raise ValueError(f'{node.value!r} is not a number in formula {text}')
+                # float arithmetic only, so eg 9**9**9 overflows into an ArithmeticError instead of
+                # computing an unbounded int
+                node.value = float(node.value)
+        self.code = compile(tree, f'<formula {text}>', 'eval')
+
+    @property
+    def inputs(self):
+        """
+        the (market, column) pairs the formula depends on
+        """
+        return {(market, self.column) for market in self.markets.values()}
+
+    def evaluate(self, values):
+        """
+        values is {market: value}, returns None if an input is missing or the result is undefined
+        """
+        try:
+            namespace = {name: float(values[market]) for name, market in self.markets.items()}
+            return round(eval(self.code, {'__builtins__': {}}, namespace), 6)
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            return None
+
+
+class FormulaEngine:
+    """
+    Keeps the compiled formulas of a quote board and their last results.
+    update() only re-evaluates the formulas with an input that changed since the previous call.
+    """
+
+    def __init__(self, column='last'):
+        self.column = column
+        self.formulas = {}  # text -> Formula, or None if it does not parse
+        self.results = {}  # text -> value
+        self.dependents = {}  # market -> set of formula texts
+        self.values = {}  # market -> last value seen
+        self.evaluations = 0
+
+    def sync(self, texts):
+        """
+        set the formulas on the board, new ones are compiled and removed ones dropped
+        """
+        texts = set(texts)
+        for text in set(self.formulas) - texts:
+            formula = self.formulas.pop(text)
+            self.results.pop(text, None)
+            if formula is not None:
+                for market in formula.markets.values():
+                    self.dependents[market].discard(text)
+        for text in texts - set(self.formulas):
+            try:
+                formula = Formula(text, self.column)
+            except (SyntaxError, ValueError) as e:
+                print(f'[FORMULA] - {e}')
+                self.formulas[text] = None
+                continue
+            self.formulas[text] = formula
+            for market in formula.markets.values():
+                self.dependents.setdefault(market, set()).add(text)
+            self.results[text] = formula.evaluate(self.values)
+            self.evaluations += 1
+
+    def update(self, values):
+        """
+        values is {market: value}, returns {formula text: result} for every formula that has a result
+        """
+        changed = set()
+        for market, texts in self.dependents.items():
+            if texts and values.get(market) != self.values.get(market):
+                changed |= texts
+        self.values = {market: values[market] for market in self.dependents if market in values}
+        for text in changed:
+            self.results[text] = self.formulas[text].evaluate(self.values)
+            self.evaluations += 1
+        return {text: result for text, result in self.results.items() if result is not None}
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import decimal
+import numpy as np
+
+
+class TickQuantizer:
+    """
+    Maps prices to integer tick indexes of one tick size (a market's priceIncrement or a ladder grouping)
+    and back. Prices are quantized once where they enter the ladder pipeline, order books, order dicts,
+    volume profiles and table rows are then keyed by the integer index.
+    eg: TickQuantizer(0.5).index(30000.5) -> 60001, .price(60001) -> 30000.5
+    """
+
+    def __init__(self, tick_size):
+        self.decimals = abs(int(decimal.Decimal(str(tick_size)).as_tuple().exponent))
+        self.tick = round(float(tick_size), self.decimals)
+
+    def index(self, price):
+        return int(round(price / self.tick))
+
+    def indexes(self, prices):
+        return np.rint(np.asarray(prices, dtype=float) / self.tick).astype(np.int64)
+
+    def price(self, index):
+        return round(index * self.tick, self.decimals)
+
+    def label(self, index):
+        return str.format('{0:.' + str(self.decimals) + 'f}', self.price(index))
+
+    def ratio(self, grouping):
+        """
+        number of ticks in a grouping, 1 for no grouping
+        """
+        return max(int(round(grouping / self.tick)), 1) if grouping else 1
+
+    @staticmethod
+    def regroup(index, ratio, up):
+        """
+        tick index to the index of the grouping of ratio ticks at or above (up) or at or below it
+        works on ints and numpy arrays
+        """
+        return -(-index // ratio) if up else index // ratio
@@ -1,69 +1,26 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import decimal
-import math
 from collections import defaultdict
-import asyncio
-import concurrent.futures
 import pandas as pd
 import numpy as np
 
-def priceBand(price, tick_size):
+from utils.TickQuantizer import TickQuantizer
 
-    decimal_places = abs(int(decimal.Decimal(str(tick_size)).as_tuple().exponent))
-
-    upper = round(int(math.ceil(price / tick_size)) * tick_size, decimal_places)
-    lower = round(upper - tick_size, decimal_places)
-
-    return upper, lower
-
-
-def aggregateVolume(tradeDict, tick_size, default_tick):
-    """
-    aggregate trade volumes for volume profile when aggregation in dom ladder tick size changes
-
-    """
-    trade_dict_cleaned = defaultdict(float)
-    if tick_size == default_tick:
-        for price, values in list(tradeDict['prices'].items()):
-            volume = tradeDict['prices'][price]['buy'] + tradeDict['prices'][price]['sell']
-            trade_dict_cleaned[price] = round(volume, 2)
-
-    else:
-        # need to round up buys to next highest tick, rounddown sells to next lower tick
-        for price, values in list(tradeDict['prices'].items()):
-            bounds = priceBand(price, tick_size)
-            for bound, side in list(zip(bounds, ['buy', 'sell'])):
-                if bound not in trade_dict_cleaned.keys():
-                    trade_dict_cleaned[bound] = values[side]
-                else:
-                    trade_dict_cleaned[bound] += values[side]
-    return trade_dict_cleaned
-
-def priceAgg(bounds, side, order_price, order_label):
-    """
-    find the correct aggregation level for a given order at a price
-    handle the case where the order_price is the same as the upper bound price for a bid (dont want to round down)
-    """
-
-    if (side == 'buy' and order_label == 'open') or (side == 'sell' and order_label == 'trigger'):
-        return max(bounds) if order_price == max(bounds) else min(bounds)
-    else:
-        return min(bounds) if order_price == min(bounds) else max(bounds)
-
-def aggregateOrders(order_dict, trigger_dict, agg_size, default_tick_size):
+def aggregateOrders(order_dict, trigger_dict, ratio):
     """
     aggregate order dict to display the orders when the aggregation in the dom ladder tick size changes
 
-    bids get rounded down to next lower agg price, offers get rounded up to next higher agg price
+    order dicts are keyed by tick index at the contract tick size, the aggregated dict by tick index at the
+    grouping of ratio ticks. bids get rounded down to next lower agg price, offers get rounded up to next
+    higher agg price, trigger orders the other way round
     eg: agg size is 0.1, default is 0.01. bid @ 54.52 -> bid @ 54.5
 
     open and trigger orders are combined
 
-    agg_order_dict = {price : {'open' : aggregated info,
-                               'trigger': aggregated info,
-                               'order_id': combined order ids for open and trigger}}
+    agg_order_dict = {tick index : {'open' : aggregated info,
+                                    'trigger': aggregated info,
+                                    'order_id': combined order ids for open and trigger}}
 
     """
     agg_order_dict = {}
@@ -71,8 +28,8 @@ def aggregateOrders(order_dict, trigger_dict, agg_size, default_tick_size):
     for order_dict_variant, label in [[order_dict, 'open'], [trigger_dict, 'trigger']]:
 
         for price, values in list(order_dict_variant.items()):
-            bounds = priceBand(price, agg_size)
-            price_agg = priceAgg(bounds, values['side'], price, label)
+            round_down = (values['side'] == 'buy') == (label == 'open')
+            price_agg = TickQuantizer.regroup(price, ratio, up=not round_down)
             if price_agg not in agg_order_dict.keys():
                 agg_order_dict[price_agg] = {}
             if label not in agg_order_dict[price_agg].keys():
@@ -126,21 +83,6 @@ def cleanTradeData(message, threshold):
             formatted.append(d)
     return formatted
 
-def staticTable(book):
-    # convert d = {'bids:{1900: 90, 1899: 88...}, 'asks':{1901:100, 1902: 200....}} to orderbook table
-    static_book = {}
-    static_book['book'] = []
-    asks = sorted(book['asks'].items(), reverse=True)
-    bids = sorted(book['bids'].items(), reverse=True)
-    for p, vol in asks:
-        static_book['book'].append([0, p, vol])
-    for p, vol in bids:
-        static_book['book'].append([vol, p, 0])
-    static_book['book'] = np.array(static_book['book'])
-    static_book['best'] = [asks[-1][0], bids[0][0]]
-    static_book['counter'] = book['counter']
-    return static_book
-
 def translator(x, mapping):
     for pre, post in mapping.items():
         x = x.replace(pre, post)
@@ -157,55 +99,86 @@ def mergeForMarketsList(req_dict):
     df = df.fillna('')
     return df[['name','description']]
 
-def mergeForQuoteBoard(req_dict):
-    markets = pd.DataFrame(req_dict['markets'])
-    markets = markets.fillna(0)
-    markets = markets.set_index('name')
-    futures = pd.DataFrame(req_dict['futures'])
-    futures = futures.fillna(0)
-    futures = futures.set_index('name')
-
-    lending = pd.DataFrame(req_dict['lending'])
-    lending = lending.rename(columns = {'estimate' : 'lend_estimate', 'previous': 'lend_prior'})
-    lending = lending.set_index('coin')
-
-    df = markets.join(futures, rsuffix= '_f')
-    funding = pd.DataFrame(req_dict['funding'])
-    funding.columns = ['name','rate', 'time']
-    funding = funding.set_index('name')
-    df = df.join(funding, rsuffix = '_fund')
-
-    #join borrow and lending on name.replace('/USD','').replace('/USDT','')
-    df = df.reset_index()
-    df['coin'] = df['name'].apply(lambda x: translator(x, {'/USD':'', '/USDT':''}))
-    df = df.set_index('coin')
-    df = df.join(lending)
-    df['lend_estimate_APY'] = df['lend_estimate'].apply(lambda x: (1 + x)**8760 - 1) #8760 is 24hrs * 365 days
-
-    df['spread'] = round(df['ask'] / df['bid'] - 1, 2)
-    df['basis'] = round(df['last'] / df['index'] - 1, 4)
-    #filter out the MOVE contracts from the basis calc as there is a special formula applied on the index
-    df['basis'] = np.where(df['name'].str.contains('BTC-MOVE'), 0,df['basis'])
-    df['change1h'] = round(df['change1h'], 4)
-    df['change24h'] = round(df['change24h'], 4)
-    df['volumeUsd24h'] = np.round(df['volumeUsd24h'].astype(int),0)
-    df['index'] = round(df['index'], 4)
-    df['rate'] = round(df['rate'] * 100,5)
-
-    df = df.fillna(0)
-    return df.reset_index()
-
-async def conHTTP(req_dict):
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=len(req_dict.keys())) as executor:
-        loop = asyncio.get_event_loop()
-        for key, function in req_dict.items():
-            req_dict[key] = loop.run_in_executor(executor, function)
-        for response in await asyncio.gather(*list(req_dict.values())):
-            pass
-        for request, response in req_dict.items():
-            req_dict[request] = response.result()
+class QuoteBoardMerger:
+    """
+    Builds the quote board table from the markets, futures, funding and lending responses.
 
+    The join from each market to its future, funding and lending rows is held as index arrays and only
+    rebuilt when the listings change, the derived columns are computed with numpy over the aligned arrays.
+    """
+    MARKET_FIELDS = ['last', 'bid', 'ask', 'change1h', 'change24h', 'volumeUsd24h']
+
+    def __init__(self):
+        self.listings = None
+        self.names = np.array([])
+
+    @staticmethod
+    def coin(name):
+        return name.replace('/USDT', '').replace('/USD', '')
+
+    @staticmethod
+    def position(rows, key):
+        """
+        first position of each key, funding rates are newest first so the latest rate is kept
+        """
+        positions = {}
+        for i, row in enumerate(rows):
+            positions.setdefault(row[key], i)
+        return positions
+
+    def buildIndex(self, markets, futures, funding, lending):
+        self.names = np.array([market['name'] for market in markets], dtype=object)
+        self.coins = np.array([self.coin(name) for name in self.names], dtype=object)
+        future_position = self.position(futures, 'name')
+        funding_position = self.position(funding, 'future')
+        lending_position = self.position(lending, 'coin')
+        self.future_ix = np.array([future_position.get(name, -1) for name in self.names], dtype=int)
+        self.funding_ix = np.array([funding_position.get(name, -1) for name in self.names], dtype=int)
+        self.lending_ix = np.array([lending_position.get(coin, -1) for coin in self.coins], dtype=int)
+        self.move = np.array(['BTC-MOVE' in name for name in self.names], dtype=bool)
+
+    @staticmethod
+    def column(rows, field):
+        return np.array([row.get(field) or 0 for row in rows], dtype=float)
+
+    @staticmethod
+    def joined(values, ix):
+        """
+        values of the joined table aligned to the markets, 0 where there is no matching row
+        """
+        values = np.append(values, 0.0)  # ix of -1 picks up the trailing 0
+        return values[ix]
+
+    def merge(self, req_dict):
+        markets, futures = req_dict['markets'], req_dict['futures']
+        funding, lending = req_dict['funding'], req_dict['lending']
+        listings = (tuple(market['name'] for market in markets), tuple(future['name'] for future in futures),
+                    tuple(rate['future'] for rate in funding), tuple(rate['coin'] for rate in lending))
+        if listings != self.listings:
+            self.buildIndex(markets, futures, funding, lending)
+            self.listings = listings
+
+        table = {'coin': self.coins, 'name': self.names}
+        for field in self.MARKET_FIELDS:
+            table[field] = self.column(markets, field)
+        index = self.joined(self.column(futures, 'index'), self.future_ix)
+        rate = self.joined(self.column(funding, 'rate'), self.funding_ix)
+        lend_estimate = self.joined(self.column(lending, 'estimate'), self.lending_ix)
+
+        last, bid, ask = table['last'], table['bid'], table['ask']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['spread'] = np.where(bid > 0, np.round(ask / bid - 1, 2), 0)
+            # the MOVE contracts have a special formula applied on the index so no basis
+            table['basis'] = np.where((index > 0) & ~self.move, np.round(last / index - 1, 4), 0)
+        table['change1h'] = np.round(table['change1h'], 4)
+        table['change24h'] = np.round(table['change24h'], 4)
+        table['volumeUsd24h'] = table['volumeUsd24h'].astype(int)
+        table['index'] = np.round(index, 4)
+        table['rate'] = np.round(rate * 100, 5)
+        table['lend_estimate'] = lend_estimate
+        table['lend_prior'] = self.joined(self.column(lending, 'previous'), self.lending_ix)
+        table['lend_estimate_APY'] = (1 + lend_estimate) ** 8760 - 1 #8760 is 24hrs * 365 days
+        return pd.DataFrame(table)
 
 def aggregateTriggerOrders(trigger_orders):
     order_dict = {}
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from threading import Lock
+from typing import List, Optional
+
+import numpy as np
+
+
+class BookTable:
+    """
+    An order book laid out for the DOM ladder: rows of [bid size, price, ask size] from the highest ask
+    down to the lowest bid, with the tick index of each row at the book grouping.
+    The arrays are preallocated and refilled in place, book and ticks are views of the filled rows.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self._rows = np.zeros((capacity, 3))
+        self._ticks = np.zeros(capacity, dtype=np.int64)
+        self._scratch = np.zeros(capacity)
+        self.size = 0
+        self.best: List[float] = [0, 0]  # [best ask, best bid]
+        self.counter = 0
+        self.grouping = None
+
+    @property
+    def book(self) -> np.ndarray:
+        return self._rows[:self.size]
+
+    @property
+    def ticks(self) -> np.ndarray:
+        return self._ticks[:self.size]
+
+    def _reserve(self, size: int) -> None:
+        if size > len(self._rows):
+            capacity = max(size, 2 * len(self._rows))
+            self._rows = np.zeros((capacity, 3))
+            self._ticks = np.zeros(capacity, dtype=np.int64)
+            self._scratch = np.zeros(capacity)
+
+    def fill(self, book, ticks, depth: Optional[int] = None, counter: int = 0) -> None:
+        """
+        copy the top depth levels of an OrderBook in, ticks is the TickQuantizer of the book grouping
+        """
+        ask_prices, ask_sizes = book.asks.top(depth)
+        bid_prices, bid_sizes = book.bids.top(depth)
+        n_asks = len(ask_prices)
+        size = n_asks + len(bid_prices)
+        self._reserve(size)
+        rows = self._rows
+        rows[:n_asks, 0] = 0
+        rows[:n_asks, 1] = ask_prices[::-1]
+        rows[:n_asks, 2] = ask_sizes[::-1]
+        rows[n_asks:size, 0] = bid_sizes
+        rows[n_asks:size, 1] = bid_prices
+        rows[n_asks:size, 2] = 0
+        scratch = self._scratch[:size]
+        np.divide(rows[:size, 1], ticks.tick, out=scratch)
+        np.rint(scratch, out=scratch)
+        self._ticks[:size] = scratch
+        self.size = size
+        self.best = [float(ask_prices[0]) if n_asks else 0, float(bid_prices[0]) if len(bid_prices) else 0]
+        self.counter = counter
+        self.grouping = ticks.tick
+
+
+class BookSnapshots:
+    """
+    Triple buffered BookTables handed from the websocket thread to the GUI thread without copying.
+
+    The writer fills the back table and swaps it with the middle one, the reader swaps the middle table
+    to the front when a newer one is there. Both swaps are O(1) under a lock, the reader keeps the front
+    table until its next take() and the writer never touches it, intermediate books are dropped.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.tables = [BookTable(capacity) for _ in range(3)]
+        self._back, self._middle, self._front = 0, 1, 2
+        self._fresh = False
+        self._lock = Lock()
+
+    def write(self, book, ticks, depth: Optional[int] = None, counter: int = 0) -> None:
+        self.tables[self._back].fill(book, ticks, depth, counter)
+        with self._lock:
+            self._back, self._middle = self._middle, self._back
+            self._fresh = True
+
+    def take(self) -> Optional[BookTable]:
+        """
+        the newest table, None if there is nothing new since the last take()
+        """
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._front, self._middle = self._middle, self._front
+            self._fresh = False
+        return self.tables[self._front]
+
+    def best(self) -> List[float]:
+        """
+        [best ask, best bid] of the newest table
+        """
+        with self._lock:
+            return self.tables[self._middle if self._fresh else self._front].best
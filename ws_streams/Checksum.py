@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import time
+import zlib
+
+
+class ChecksumVerifier:
+    """
+    Sampled CRC32 verification of a full depth OrderBook against the checksum sent by FTX.
+
+    Verification runs every_n messages or once interval seconds have passed since the last check,
+    whichever comes first. force() makes the next message verify regardless, eg: after a partial.
+    A mismatch on a sampled message still catches any corruption from the skipped messages before it,
+    as the checksum covers the whole top of book.
+    """
+
+    def __init__(self, every_n: int = 1, interval: float = None, depth: int = 100) -> None:
+        self.every_n = max(int(every_n), 1)
+        self.interval = interval
+        self.depth = depth
+        self.verified = 0
+        self.skipped = 0
+        self.mismatches = 0
+        self.force()
+
+    def force(self) -> None:
+        self._pending = 0
+        self._last_check = 0.0
+        self._forced = True
+
+    def due(self) -> bool:
+        self._pending += 1
+        if self._forced or self._pending >= self.every_n:
+            return True
+        return self.interval is not None and time.time() - self._last_check >= self.interval
+
+    def verify(self, book, checksum: int) -> bool:
+        self._pending = 0
+        self._last_check = time.time()
+        self._forced = False
+        self.verified += 1
+        if int(zlib.crc32(book.checksum_input(self.depth).encode())) != checksum:
+            self.mismatches += 1
+            return False
+        return True
+
+    def check(self, book, checksum: int) -> bool:
+        """
+        returns False only when a due verification fails, skipped messages are treated as valid
+        """
+        if not self.due():
+            self.skipped += 1
+            return True
+        return self.verify(book, checksum)
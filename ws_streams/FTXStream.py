@@ -1,316 +1,177 @@
 import hmac
-import json
 import time
-import zlib
-from collections import defaultdict, deque
-from itertools import zip_longest
-from typing import DefaultDict, Deque, List, Dict, Tuple, Optional
+from threading import Lock
+from typing import Callable, List, Dict, Set, Tuple
 
 try:
     import websocket_manager
+    from MessageDecoder import MessageDecoder
 except:
     from ws_streams import websocket_manager
+    from ws_streams.MessageDecoder import MessageDecoder
 
 
 class FtxWebsocketClient(websocket_manager.WebsocketManager):
+    """
+    A single FTX websocket connection shared by many consumers.
+
+    Consumers register a callback against a subscription with subscribe(). Subscriptions are reference
+    counted, the exchange subscribe is only sent for the first consumer and the unsubscribe for the last.
+    Messages are decoded once and routed to the callbacks registered for their (channel, market) key.
+
+    Subscriptions and the login are kept as state and only sent while the connection is open, on every
+    (re)connect _on_connected() logs in again and restores all of them in one pass.
+    """
     _ENDPOINT = 'wss://ftx.com/ws/'
-    MAX_TABLE_LEN = 100
+    # channels which start with a partial. a consumer joining an existing subscription needs a fresh one
+    _SNAPSHOT_CHANNELS = {'orderbook', 'orderbookGrouped'}
+    _PRIVATE_CHANNELS = {'fills', 'orders'}
+    _DATA_TYPES = {'partial', 'update'}
 
-    def __init__(self, api_key = '', api_secret = '', agg_choice = None) -> None:
+    def __init__(self, api_key = '', api_secret = '') -> None:
         super().__init__()
-        self.hasFirstMsg = False #used for ping thread to let know to start after on message called
-        self._trades: DefaultDict[str, Deque] = defaultdict(lambda: deque([], maxlen=1000))
-        self._fills: Deque = deque([], maxlen=10000)
         self._api_key = api_key
         self._api_secret = api_secret
 
         self._reset_data()
-        
-        self.orderbook_state = {}
-        self.orderbook_state['counter'] = 0
-        self.orderbook_state['bids'] = {0:0}
-        self.orderbook_state['asks'] = {0:0}
-        
-        self.order_position = []
-        
-        self.trade_volume_dict = {}
-        self.trade_volume_dict['counter'] = 0
-        self.trade_volume_dict['prices'] = {}
-        
-        self.last_trade_price = {}
-        self.last_trade_price['counter'] = 0
-        self.last_trade_price['price'] = ''
-        
-        self.trades = {}
-        self.trades['counter'] = 0
-        self.trades_list: Deque = deque([], maxlen=10000)
-        
-        self.agg_choice = agg_choice if agg_choice else 'full'
-        
-        self.message = ''
-        
-        self.counter = 0
-        self.interruptPing = False
-        self.closedFlag = False
-
-    def _on_open(self, ws):
-        self._reset_data()
+
+        self._listener_lock = Lock()
+        self._listeners: Dict[Tuple, Tuple[Callable, ...]] = {}
+        self._subscription_counts: Dict[Tuple, int] = {}
+
+        # data messages go to the listeners by subscription key, control messages by type
+        # (subscribed, pong, error are dropped)
+        self._control_handlers: Dict[str, Callable[[Dict], None]] = {'info': self._handle_info_message}
+        self._decoder = MessageDecoder(wanted=self._wanted)
 
     def _reset_data(self) -> None:
         self._subscriptions: List[Dict] = []
-        self._orders: Dict[int, Dict] = {}
-        self._orderbook_timestamps: Dict[str, float] = {}
-        self._orderbook: Dict[str, Dict[float, float]] = {side: {} for side in {'bids', 'asks'}}
+        self._active: Set[Tuple] = set()  # (channel, market) of the subscriptions, for the decoder
         self._logged_in = False
-        self._last_received_orderbook_data_at: float = 0.0
-
-    def reset_volume_profile(self) -> None:
-        self.trade_volume_dict['prices'] = {}
-        self.trade_volume_dict['counter'] = 0
-
-
-    def _reset_orderbook(self, market: str) -> None:
-        self._orderbook: Dict[str, Dict[float, float]] = {side: {} for side in {'bids', 'asks'}}
-        self._orderbook_timestamps: Dict[str, float] = {}
 
     def _get_url(self) -> str:
         return self._ENDPOINT
 
-    def _login(self) -> None:
+    def _login_message(self) -> Dict:
         ts = int(time.time() * 1000)
-        self.send_json({'op': 'login', 'args': {
+        return {'op': 'login', 'args': {
             'key': self._api_key,
             'sign': hmac.new(
                 self._api_secret.encode(), f'{ts}websocket_login'.encode(), 'sha256').hexdigest(),
             'time': ts,
-        }})
-        self._logged_in = True
+        }}
+
+    def _login(self) -> None:
+        with self.connect_lock:
+            self._logged_in = True
+            if self.connected:
+                self.send_json(self._login_message())
+            else:
+                self.connect()
 
     def _subscribe(self, subscription: Dict) -> None:
-        self.send_json({'op': 'subscribe', **subscription})
-        self._subscriptions.append(subscription)
+        with self.connect_lock:
+            self._subscriptions.append(subscription)
+            self._active.add((subscription['channel'], subscription.get('market')))
+            if self.connected:
+                self.send_json({'op': 'subscribe', **subscription})
+            else:
+                self.connect()
 
 
     def _unsubscribe(self, subscription: Dict) -> None:
-        self.send_json({'op': 'unsubscribe', **subscription})
-        while subscription in self._subscriptions:
-            self._subscriptions.remove(subscription)
-
-    def _unsubscribe_all(self):
+        with self.connect_lock:
+            while subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            self._active = {(s['channel'], s.get('market')) for s in self._subscriptions}
+            if self.connected:
+                self.send_json({'op': 'unsubscribe', **subscription})
+
+    def _on_connected(self) -> None:
+        # a new connection has no login or subscriptions, snapshot channels send a fresh partial
+        if self._logged_in:
+            self.send_json(self._login_message())
         for subscription in self._subscriptions:
-            self.send_json({'op': 'unsubscribe', **subscription})
-
-    def stopHeartBeat(self):
-        self.interruptPing = True
-
-
-    def _reset_subscriptions(self):
-        if not self.closedFlag:
-            for subscription in self._subscriptions:
+            self.send_json({'op': 'subscribe', **subscription})
+
+
+    @staticmethod
+    def _key(subscription: Dict) -> Tuple:
+        return subscription['channel'], subscription.get('market'), subscription.get('grouping')
+
+    def subscribe(self, subscription: Dict, callback: Callable[[Dict], None]) -> None:
+        """
+        route messages for the subscription to callback, subscribing on the exchange for the first consumer
+        """
+        key = self._key(subscription)
+        with self._listener_lock:
+            self._listeners[key] = self._listeners.get(key, ()) + (callback,)
+            count = self._subscription_counts.get(key, 0)
+            self._subscription_counts[key] = count + 1
+            if count == 0:
+                if subscription['channel'] in self._PRIVATE_CHANNELS and not self._logged_in:
+                    self._login()
+                self._subscribe(subscription)
+            elif subscription['channel'] in self._SNAPSHOT_CHANNELS:
+                # the new consumer has missed the partial, existing consumers reset on the new one
+                self.resubscribe(subscription)
+
+    def unsubscribe(self, subscription: Dict, callback: Callable[[Dict], None]) -> None:
+        """
+        stop routing messages to callback, unsubscribing on the exchange once the last consumer has gone
+        """
+        key = self._key(subscription)
+        with self._listener_lock:
+            listeners = list(self._listeners.get(key, ()))
+            if callback not in listeners:
+                return
+            listeners.remove(callback)
+            self._listeners[key] = tuple(listeners)
+            self._subscription_counts[key] -= 1
+            if self._subscription_counts[key] == 0:
+                del self._subscription_counts[key]
+                del self._listeners[key]
+                self._unsubscribe(subscription)
+
+    def resubscribe(self, subscription: Dict) -> None:
+        """
+        request a fresh partial for an active subscription without changing its consumers
+        while connecting there is nothing to do, the subscription is restored with a partial on open
+        """
+        with self.connect_lock:
+            if self.connected:
+                self.send_json({'op': 'unsubscribe', **subscription})
                 self.send_json({'op': 'subscribe', **subscription})
-        else:
-            pass
-
-
-
-    def get_fills(self) -> List[Dict]:
-        if not self._logged_in:
-            self._login()
-        subscription = {'channel': 'fills'}
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
-        return list(self._fills.copy())
-
-    def get_orders(self) -> Dict[int, Dict]:
-        if not self._logged_in:
-            self._login()
-        subscription = {'channel': 'orders'}
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
-        return dict(self._orders.copy())
-
-    def get_trades(self, market: str) -> List[Dict]:
-        subscription = {'channel': 'trades', 'market': market}
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
-        return list(self._trades[market].copy())
-
-    def subscribe_orderbook(self, market: str) -> None:
-        subscription = {'channel': 'orderbook', 'market': market}
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
-
-    def get_orderbook(self, market: str, grouping = None) -> Dict[str, List[Tuple[float, float]]]:
-        if grouping is None:
-            subscription = {'channel': 'orderbook', 'market': market}
-        else:
-            subscription = {'channel': 'orderbookGrouped', 'market': market, 'grouping' : grouping}
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
-        d = {
-            side: sorted(
-                [(price, quantity) for price, quantity in list(self.d[side].items())
-                 if quantity],
-                key=lambda order: order[0] * (-1 if side == 'bids' else 1)
-            )
-            for side in {'bids', 'asks'}
-        }
-        self.best_bid = d['bids'][0][0]
-        self.best_ask = d['asks'][0][0]
-        return d
-
-    def get_orderbook_timestamp(self, market: str) -> float:
-        return self._orderbook_timestamps[market]
-
-    def get_ticker(self, market: str) -> Dict:
-        subscription = {'channel': 'ticker', 'market': market}
-        if subscription not in self._subscriptions:
-            self._subscribe(subscription)
-        return self._tickers[market]
-
-    def _handle_orderbook_message(self, message: Dict) -> None:
-        market = message['market']
-        if self.agg_choice != 'full':
-            return
-        subscription = {'channel': 'orderbook', 'market': market}
-        if subscription not in self._subscriptions:
-            return
-        data = message['data']
-        if data['action'] == 'partial':
-        
-            self._reset_orderbook(market)
-            self.d = {'bids': defaultdict(float), 'asks': defaultdict(float)}
-        for side in {'bids', 'asks'}:
-            book = self.d[side]
-            for price, size in data[side]:
-                if size:
-                    book[price] = size
-                else:
-                    del book[price]
-            self._orderbook_timestamps[market] = data['time']
-
-        checksum = data['checksum']
-        orderbook = self.get_orderbook(market)
-        checksum_data = [
-            ':'.join([f'{float(order[0])}:{float(order[1])}' for order in (bid, offer) if order])
-            for (bid, offer) in zip_longest(orderbook['bids'][:100], orderbook['asks'][:100])
-        ]
-
-        computed_result = int(zlib.crc32(':'.join(checksum_data).encode()))
-        if computed_result != checksum:
-            self._last_received_orderbook_data_at = 0
-            self._reset_orderbook(market)
-            self._unsubscribe(subscription)
-            self._subscribe(subscription)
-        else:
-            self.orderbook_state = self.d
-            self.orderbook_state['counter'] = self.counter
-            self.counter += 1
-
-    def _handle_orderbook_grouped_message(self, message: Dict, grouping: float) -> None:
-        if self.agg_choice == 'full':
-            return
-        market = message['market']
-        subscription = {'channel': 'orderbookGrouped', 'market': market, 'grouping' : grouping}
-        if subscription not in self._subscriptions:
-            return
-        data = message['data']
-        if message['type'] == 'partial':
-            self._reset_orderbook(market)
-            self.d = {'bids': defaultdict(float), 'asks':defaultdict(float)}
-            for side in {'bids', 'asks'}:
-                for price, size in data[side]:
-                    self.d[side][price] = size
-
-        elif message['type'] == 'update':
-            for side in {'bids', 'asks'}:
-                for price, size in data[side]:
-                    if size != 0:
-                        self.d[side][price] = size
-                    else:
-                        # entry for volume is 0 but
-                        if price in self.d[side].keys():
-                            del self.d[side][price]
-                        else:
-                            pass
-                            #print(f'{side} {price} not in dict')
-        else:
-            print(message['data'])
-
-        self.orderbook_state = {'bids' : defaultdict(float), 'asks': defaultdict(float)}
-        for bids in list(sorted(self.d['bids'], reverse = True))[:50]:
-            self.orderbook_state['bids'][bids] = self.d['bids'][bids]
-        for asks in list(sorted(self.d['asks']))[:50]:
-            self.orderbook_state['asks'][asks] = self.d['asks'][asks]
-        self.orderbook_state['counter'] = self.counter
-        self.counter += 1
-
-        
-    def _handle_trades_message(self, message: Dict) -> None:
-
-        self.trades_list.append(message)
-        self._trades[message['market']].append(message['data'])
-
-        for trade in message['data']:
-            price = trade['price']
-            volume = round(trade['size'],2)
-            side = trade['side']
-            if price not in self.trade_volume_dict['prices'].keys():
-                self.trade_volume_dict['prices'][price] = {}
-                self.trade_volume_dict['prices'][price][side] = round(volume,2)
-                init_side = 'buy' if side == 'sell' else 'sell'
-                self.trade_volume_dict['prices'][price][init_side] = 0
-            else:
-                self.trade_volume_dict['prices'][price][side] += round(volume,2)
-        self.trade_volume_dict['counter'] += 1
-        self.last_trade_price['price'] = message['data'][-1]['price']
-        self.last_trade_price['counter'] += 1
 
-    def _handle_ticker_message(self, message: Dict) -> None:
-        self._tickers[message['market']] = message['data']
+    def subscriber_count(self, subscription: Dict) -> int:
+        return self._subscription_counts.get(self._key(subscription), 0)
+
+    def _dispatch(self, message: Dict) -> None:
+        key = (message['channel'], message.get('market'), message.get('grouping'))
+        for callback in self._listeners.get(key, ()):
+            callback(message)
 
-    def _handle_fills_message(self, message: Dict) -> None:
-        data = message['data']
-        self._fills.append(data)
+    def _handle_info_message(self, message: Dict) -> None:
+        if message['code'] == 20001:
+            # server restart
+            self.reconnect()
 
-    def _handle_orders_message(self, message: Dict) -> None:
-        data = message['data']
-        self._orders.update({data['id']: data})
+    def _wanted(self, channel: str, market: str) -> bool:
+        return (channel, market) in self._active
 
     def _on_message(self, ws, raw_message: str) -> None:
 
-        self.hasFirstMsg = True
-        message = json.loads(raw_message)
-        self.message = message
+        message = self._decoder.decode(raw_message)
+        if message is None:
+            # data for a channel nothing is subscribed to
+            return
         message_type = message['type']
-        if message_type in {'subscribed', 'unsubscribed', 'pong'}:
+        if message_type not in self._DATA_TYPES:
+            handler = self._control_handlers.get(message_type)
+            if handler is not None:
+                handler(message)
             return
-        elif message_type == 'info':
-            if message['code'] == 20001:
-                return self.reconnect()
-        elif message_type == 'error':
-            pass
-            #print('error message', message)
-
-        channel = message['channel']
-        if channel == 'orderbook':
-            self._handle_orderbook_message(message)
-        elif channel == 'orderbookGrouped':
-            self._handle_orderbook_grouped_message(message, grouping = message['grouping'])
-        elif channel == 'trades':
-            self._handle_trades_message(message)
-        elif channel == 'ticker':
-            pass
-            self._handle_ticker_message(message)
-        elif channel == 'fills':
-            #pass
-            self.order_position.append(message)
-            self._handle_fills_message(message)
-        elif channel == 'orders':
-            self.order_position.append(message)
-            self._handle_orders_message(message)
-        else:
-            pass
+        self._dispatch(message)
 
 
 
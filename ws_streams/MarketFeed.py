@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import time
+from threading import Condition, Lock
+from typing import Dict, Optional, Set
+
+try:
+    from OrderBook import OrderBook
+    from Checksum import ChecksumVerifier
+    from VolumeProfile import VolumeProfile
+    from BookSnapshots import BookSnapshots
+except:
+    from ws_streams.OrderBook import OrderBook
+    from ws_streams.Checksum import ChecksumVerifier
+    from ws_streams.VolumeProfile import VolumeProfile
+    from ws_streams.BookSnapshots import BookSnapshots
+from utils.TickQuantizer import TickQuantizer
+
+
+class MarketFeed:
+    """
+    Orderbook and trade state for one DOM ladder, fed by a shared FtxWebsocketClient.
+
+    The feed registers its own callbacks on the connection so several ladders (on the same or different
+    markets) can share one socket, one reader thread and one json decode per message.
+
+    Consumers block in waitForUpdate() and are woken as soon as a validated book or a trade arrives.
+
+    The book is written by the websocket thread and reset by changeAggregation() from the consumer thread,
+    both under _book_lock. Book messages for a grouping other than agg_choice (still in flight after a
+    change) are dropped.
+    """
+    # full depth orderbook checksum is verified every Nth message or after the interval, whichever is first
+    CHECKSUM_EVERY_N = 10
+    CHECKSUM_INTERVAL_S = 1.0
+    CHECKSUM_DEPTH = 100
+    GROUPED_DEPTH = 50
+
+    def __init__(self, client, market: str, agg_choice=None, tick_size: float = None, groupings=()) -> None:
+        self.client = client
+        self.market = market
+        self.agg_choice = agg_choice if agg_choice else 'full'
+
+        self.book = OrderBook()
+        self._book_lock = Lock()
+        self.checksum = ChecksumVerifier(self.CHECKSUM_EVERY_N, self.CHECKSUM_INTERVAL_S, self.CHECKSUM_DEPTH)
+        self._synced = False  # updates are ignored until the partial for the current subscription arrives
+
+        # ladder tables of the book for the GUI, see BookSnapshots
+        self.tick_size = tick_size if tick_size else 1.0
+        self.book_ticks = self.bookTicks(self.agg_choice)
+        self.snapshots = BookSnapshots()
+        self.counter = 0
+
+        # traded volume at the contract tick and at each grouping, see VolumeProfile
+        self.volume_profile = VolumeProfile(self.tick_size, groupings)
+
+        self.last_trade_price = {}
+        self.last_trade_price['counter'] = 0
+        self.last_trade_price['price'] = ''
+
+        self._update_condition = Condition()
+        self._pending_updates: Set[str] = set()
+
+    def bookSubscription(self, agg_choice=None) -> Dict:
+        agg_choice = self.agg_choice if agg_choice is None else agg_choice
+        if agg_choice == 'full':
+            return {'channel': 'orderbook', 'market': self.market}
+        return {'channel': 'orderbookGrouped', 'market': self.market, 'grouping': agg_choice}
+
+    def tradeSubscription(self) -> Dict:
+        return {'channel': 'trades', 'market': self.market}
+
+    def bookTicks(self, agg_choice) -> TickQuantizer:
+        return TickQuantizer(self.tick_size if agg_choice == 'full' else agg_choice)
+
+    def _bookCallback(self, agg_choice):
+        return self._handle_orderbook_message if agg_choice == 'full' else self._handle_orderbook_grouped_message
+
+    def start(self) -> None:
+        self.client.subscribe(self.bookSubscription(), self._bookCallback(self.agg_choice))
+        self.client.subscribe(self.tradeSubscription(), self._handle_trades_message)
+
+    def stop(self) -> None:
+        self.client.unsubscribe(self.bookSubscription(), self._bookCallback(self.agg_choice))
+        self.client.unsubscribe(self.tradeSubscription(), self._handle_trades_message)
+
+    def changeAggregation(self, agg_choice) -> None:
+        self.client.unsubscribe(self.bookSubscription(), self._bookCallback(self.agg_choice))
+        with self._book_lock:
+            self.agg_choice = agg_choice
+            self.book_ticks = self.bookTicks(agg_choice)
+            self._reset_orderbook()
+        self.client.subscribe(self.bookSubscription(), self._bookCallback(self.agg_choice))
+
+    def notify(self, update: str) -> None:
+        """
+        flag an update ('book', 'trades' or 'wake' for control changes) and wake the consumer
+        """
+        with self._update_condition:
+            self._pending_updates.add(update)
+            self._update_condition.notify_all()
+
+    def wake(self) -> None:
+        self.notify('wake')
+
+    def waitForUpdate(self, timeout: Optional[float] = None, coalesce: float = 0.0) -> Set[str]:
+        """
+        block until an update is flagged or timeout seconds pass, returns the set of updates flagged.
+        once woken, waits a further coalesce seconds so a burst of messages is handed over as one update
+        """
+        with self._update_condition:
+            if not self._pending_updates:
+                self._update_condition.wait(timeout)
+            if not self._pending_updates:
+                return set()
+        if coalesce:
+            time.sleep(coalesce)
+        with self._update_condition:
+            updates, self._pending_updates = self._pending_updates, set()
+        return updates
+
+    def reset_volume_profile(self) -> None:
+        self.volume_profile.clear()
+
+    def _reset_orderbook(self) -> None:
+        self.book.reset()
+        self.checksum.force()
+        self._synced = False
+
+    def _handle_orderbook_message(self, message: Dict) -> None:
+        data = message['data']
+        with self._book_lock:
+            if self.agg_choice != 'full':
+                return
+            if data['action'] == 'partial':
+                self._reset_orderbook()
+                self._synced = True
+            elif not self._synced:
+                return
+            self.book.apply(data)
+
+            if not self.checksum.check(self.book, data['checksum']):
+                # forced resync, the next partial is always verified
+                self._reset_orderbook()
+                self.client.resubscribe(self.bookSubscription())
+            else:
+                self.snapshots.write(self.book, self.book_ticks, counter=self.counter)
+                self.counter += 1
+                self.notify('book')
+
+    def _handle_orderbook_grouped_message(self, message: Dict) -> None:
+        data = message['data']
+        with self._book_lock:
+            if message.get('grouping') != self.agg_choice:
+                return
+            if message['type'] == 'partial':
+                self._reset_orderbook()
+                self._synced = True
+                self.book.apply(data)
+            elif message['type'] == 'update':
+                if not self._synced:
+                    return
+                # a size of 0 removes the level, levels not in the book are ignored
+                self.book.apply(data)
+            else:
+                print(message['data'])
+
+            self.snapshots.write(self.book, self.book_ticks, self.GROUPED_DEPTH, self.counter)
+            self.counter += 1
+            self.notify('book')
+
+    def _handle_trades_message(self, message: Dict) -> None:
+        self.volume_profile.add(message['data'])
+        self.last_trade_price['price'] = message['data'][-1]['price']
+        self.last_trade_price['counter'] += 1
+        self.notify('trades')
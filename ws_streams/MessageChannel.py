@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from collections import deque
+from threading import Event
+from typing import Any, List, Optional
+
+
+class MessageChannel:
+    """
+    Bounded channel from the websocket thread to a consumer thread.
+
+    put() appends to a deque and sets an event, neither takes a lock the consumer holds: deque appends and
+    pops are atomic. drain() waits on the event up to a timeout and hands over everything pending in one
+    batch. When the channel is full the oldest message is dropped and counted in dropped, so a consumer
+    that must not miss messages can compare it against the count it last saw and resync.
+    """
+
+    def __init__(self, capacity: int = 10000) -> None:
+        self.capacity = capacity
+        self._queue = deque([], maxlen=capacity)
+        self._ready = Event()
+        self.closed = False
+        self.puts = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def put(self, message: Any) -> None:
+        pending = len(self._queue)
+        if pending >= self.capacity:
+            self.dropped += 1
+        else:
+            self.high_water = max(self.high_water, pending + 1)
+        self._queue.append(message)
+        self.puts += 1
+        self._ready.set()
+
+    def drain(self, timeout: Optional[float] = None, max_items: Optional[int] = None) -> List[Any]:
+        """
+        every pending message, or up to max_items, oldest first. waits up to timeout seconds (None for ever,
+        0 not at all) for one to arrive, returns [] on timeout or once the channel is closed and empty
+        """
+        if not self._queue and not self.closed and timeout != 0:
+            self._ready.wait(timeout)
+        # clear before popping, a put after this sets the event again for the next drain
+        self._ready.clear()
+        batch = []
+        popleft = self._queue.popleft
+        try:
+            while max_items is None or len(batch) < max_items:
+                batch.append(popleft())
+        except IndexError:
+            pass
+        if self._queue:
+            self._ready.set()
+        return batch
+
+    def close(self) -> None:
+        """
+        wake the consumer, used when its thread stops
+        """
+        self.closed = True
+        self._ready.set()
+
+    def stats(self) -> dict:
+        return {'pending': len(self._queue), 'puts': self.puts, 'dropped': self.dropped,
+                'high_water': self.high_water}
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import re
+from typing import Callable, Dict, Optional
+
+try:
+    import orjson
+    loads, BACKEND = orjson.loads, 'orjson'
+except ImportError:
+    try:
+        import ujson
+        loads, BACKEND = ujson.loads, 'ujson'
+    except ImportError:
+        import json
+        loads, BACKEND = json.loads, 'json'
+
+
+class MessageDecoder:
+    """
+    Decodes raw websocket messages with the fastest json parser installed (orjson, ujson, else json).
+
+    With wanted(channel, market) set, data messages are peeked at first: FTX starts them with
+    {"channel": ..., "market": ..., "type": "update", so the channel and market are read off the head and
+    the message is dropped without decoding when nothing wants it (eg: updates still in flight after an
+    unsubscribe). Anything that does not match the head pattern is decoded in full.
+    """
+    HEAD = re.compile(r'\{"channel":\s*"(\w+)",\s*"market":\s*"([^"]+)",\s*"type":\s*"(?:update|partial)"')
+    HEAD_LEN = 160
+
+    def __init__(self, wanted: Optional[Callable[[str, str], bool]] = None, loads: Callable = loads) -> None:
+        self.wanted = wanted
+        self.loads = loads
+        self.decoded = 0
+        self.skipped = 0
+
+    def decode(self, raw) -> Optional[Dict]:
+        """
+        the decoded message, None if it was skipped
+        """
+        if self.wanted is not None and isinstance(raw, str):
+            head = self.HEAD.match(raw, 0, self.HEAD_LEN)
+            if head and not self.wanted(head.group(1), head.group(2)):
+                self.skipped += 1
+                return None
+        self.decoded += 1
+        return self.loads(raw)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class BookSide:
+    """
+    One side of an order book held in price priority order.
+
+    Levels are searched through a sorted list of keys (the price for asks, the negated price for bids)
+    so index 0 is always the best level. Prices and sizes are held in parallel numpy arrays which are
+    shifted in place on insert/delete, so top of book views never need a sort.
+
+    The formatted price:size checksum token of each level is cached alongside and only re-rendered
+    after that level changes.
+    """
+
+    def __init__(self, side: str, capacity: int = 256) -> None:
+        self.side = side
+        self._sign = -1.0 if side == 'bids' else 1.0
+        self._keys: List[float] = []
+        self._tokens: List[Optional[str]] = []
+        self._prices = np.zeros(capacity)
+        self._sizes = np.zeros(capacity)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self) -> None:
+        self._keys = []
+        self._tokens = []
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._prices)
+        self._prices = np.resize(self._prices, capacity)
+        self._sizes = np.resize(self._sizes, capacity)
+
+    def update(self, price: float, size: float) -> None:
+        """
+        set the size at a price level, a size of 0 removes the level
+        """
+        key = self._sign * price
+        keys = self._keys
+        n = len(keys)
+        i = bisect_left(keys, key)
+        exists = i < n and keys[i] == key
+        if size:
+            if exists:
+                self._sizes[i] = size
+                self._tokens[i] = None
+                return
+            if n == len(self._prices):
+                self._grow()
+            keys.insert(i, key)
+            self._tokens.insert(i, None)
+            self._prices[i + 1:n + 1] = self._prices[i:n]
+            self._sizes[i + 1:n + 1] = self._sizes[i:n]
+            self._prices[i] = price
+            self._sizes[i] = size
+        elif exists:
+            del keys[i]
+            del self._tokens[i]
+            self._prices[i:n - 1] = self._prices[i + 1:n]
+            self._sizes[i:n - 1] = self._sizes[i + 1:n]
+
+    def best(self) -> Optional[float]:
+        return float(self._prices[0]) if self._keys else None
+
+    def top(self, depth: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        returns (prices, sizes) views best level first. views are only valid until the next update
+        """
+        n = len(self._keys) if depth is None else min(depth, len(self._keys))
+        return self._prices[:n], self._sizes[:n]
+
+    def tokens(self, depth: int) -> List[str]:
+        """
+        checksum tokens 'price:size' for the best depth levels, rendering only the levels changed since last call
+        """
+        tokens = self._tokens
+        n = min(depth, len(tokens))
+        for i in range(n):
+            if tokens[i] is None:
+                tokens[i] = f'{float(self._prices[i])}:{float(self._sizes[i])}'
+        return tokens[:n]
+
+    def levels(self, depth: Optional[int] = None) -> np.ndarray:
+        """
+        returns a copy of the levels as a (n, 2) array of [price, size], best level first
+        """
+        prices, sizes = self.top(depth)
+        return np.column_stack((prices, sizes))
+
+
+class OrderBook:
+    """
+    Order book for a single market built from the FTX orderbook and orderbookGrouped channels
+    """
+
+    def __init__(self) -> None:
+        self.bids = BookSide('bids')
+        self.asks = BookSide('asks')
+        self.timestamp = 0.0
+
+    def __getitem__(self, side: str) -> BookSide:
+        return self.bids if side == 'bids' else self.asks
+
+    def reset(self) -> None:
+        self.bids.clear()
+        self.asks.clear()
+        self.timestamp = 0.0
+
+    def apply(self, data: Dict) -> None:
+        """
+        apply a partial or update message data payload, {'bids': [[price, size], ...], 'asks': [...]}
+        """
+        for side in ('bids', 'asks'):
+            book_side = self[side]
+            for price, size in data[side]:
+                book_side.update(price, size)
+        self.timestamp = data.get('time', self.timestamp)
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+
+    def top(self, depth: Optional[int] = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        return {'bids': self.bids.top(depth), 'asks': self.asks.top(depth)}
+
+    def snapshot(self, depth: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        copy of the book safe to hand to another thread
+        {'bids': np.array([[price, size], ...]), 'asks': np.array([[price, size], ...])} best level first
+        """
+        return {'bids': self.bids.levels(depth), 'asks': self.asks.levels(depth)}
+
+    def checksum_input(self, depth: int = 100) -> str:
+        """
+        FTX checksum string, levels interleaved best bid, best ask, 2nd bid, 2nd ask... as price:size
+        """
+        bids = self.bids.tokens(depth)
+        asks = self.asks.tokens(depth)
+        tokens = []
+        for i in range(max(len(bids), len(asks))):
+            if i < len(bids):
+                tokens.append(bids[i])
+            if i < len(asks):
+                tokens.append(asks[i])
+        return ':'.join(tokens)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from threading import RLock
+from typing import Dict, Iterable
+
+from utils.TickQuantizer import TickQuantizer
+
+
+class OrderStore:
+    """
+    Open orders of one market indexed by order id, by price level (tick index) and by ladder bucket
+    (tick index at the ladder grouping of ratio ticks, bids rounded down and offers up).
+
+    apply() takes an FTX orders channel message and moves only that order between its level and bucket,
+    keeping their remaining quantity up to date, so a fill or cancel costs the same however many orders
+    are resting. The ladder entries of the buckets touched are rebuilt on the next ladderOrders().
+    """
+
+    def __init__(self, ticks: TickQuantizer, ratio: int = 1) -> None:
+        self.ticks = ticks
+        self.ratio = ratio
+        self.orders: Dict[int, Dict] = {}  # order id -> order
+        self.levels: Dict[int, Dict] = {}  # tick index -> {'quantity', 'side', 'orders': {order id: order}}
+        self.buckets: Dict[int, Dict] = {}  # ladder bucket -> same as levels
+        self.entries: Dict[int, Dict] = {}  # ladder bucket -> aggregateOrders style entry
+        self.resting = {'buy': 0.0, 'sell': 0.0}  # remaining quantity by side
+        self.dirty = set()
+        self._lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def bucket(self, tick_index: int, side: str) -> int:
+        return TickQuantizer.regroup(tick_index, self.ratio, up=side == 'sell')
+
+    @staticmethod
+    def _insert(groups: Dict, key: int, order: Dict) -> None:
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {'quantity': 0.0, 'side': order['side'], 'orders': {}}
+        group['orders'][order['id']] = order
+        group['quantity'] = round(group['quantity'] + order['remainingSize'], 8)
+
+    @staticmethod
+    def _discard(groups: Dict, key: int, order: Dict) -> None:
+        group = groups[key]
+        del group['orders'][order['id']]
+        if group['orders']:
+            group['quantity'] = round(group['quantity'] - order['remainingSize'], 8)
+        else:
+            del groups[key]
+
+    def _add(self, order: Dict) -> None:
+        tick_index = self.ticks.index(order['price'])
+        bucket = self.bucket(tick_index, order['side'])
+        self.orders[order['id']] = order
+        self.resting[order['side']] = round(self.resting[order['side']] + order['remainingSize'], 8)
+        self._insert(self.levels, tick_index, order)
+        self._insert(self.buckets, bucket, order)
+        self.dirty.add(bucket)
+
+    def _remove(self, order_id: int) -> bool:
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return False
+        tick_index = self.ticks.index(order['price'])
+        bucket = self.bucket(tick_index, order['side'])
+        self.resting[order['side']] = round(self.resting[order['side']] - order['remainingSize'], 8)
+        self._discard(self.levels, tick_index, order)
+        self._discard(self.buckets, bucket, order)
+        self.dirty.add(bucket)
+        return True
+
+    def apply(self, order: Dict) -> bool:
+        """
+        apply an order update, returns True if the resting orders changed
+        """
+        with self._lock:
+            changed = self._remove(order['id'])
+            if order['status'] != 'closed' and order['remainingSize']:
+                self._add(order)
+                changed = True
+            return changed
+
+    def load(self, orders: Iterable[Dict]) -> None:
+        """
+        replace the store with the open orders from the REST api
+        """
+        with self._lock:
+            self.orders, self.levels, self.buckets, self.entries = {}, {}, {}, {}
+            self.resting = {'buy': 0.0, 'sell': 0.0}
+            self.dirty = set()
+            for order in orders:
+                self.apply(order)
+
+    def setRatio(self, ratio: int) -> None:
+        with self._lock:
+            if ratio == self.ratio:
+                return
+            self.ratio = ratio
+            self.buckets, self.entries = {}, {}
+            for order in self.orders.values():
+                bucket = self.bucket(self.ticks.index(order['price']), order['side'])
+                self._insert(self.buckets, bucket, order)
+            self.dirty = set(self.buckets)
+
+    def ladderOrders(self) -> Dict[int, Dict]:
+        """
+        {bucket: {'open': {'quantity', 'side', 'orders', 'order_id'}, 'open_order_id': [...]}} as built by
+        aggregateOrders. entries are replaced rather than modified, so the dict can be shared with the GUI
+        """
+        with self._lock:
+            for bucket in self.dirty:
+                group = self.buckets.get(bucket)
+                if group is None:
+                    self.entries.pop(bucket, None)
+                    continue
+                order_ids = list(group['orders'])
+                self.entries[bucket] = {'open': {'quantity': group['quantity'],
+                                                 'side': group['side'],
+                                                 'orders': list(group['orders'].values()),
+                                                 'order_id': order_ids},
+                                        'open_order_id': order_ids}
+            self.dirty = set()
+            return dict(self.entries)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class PositionLedger:
+    """
+    Position (futures) or coin balance (spot) of one market kept from the fills stream.
+
+    seed() sets it from the REST positions / balances, applyFill() then applies each fill's size, side and
+    fee locally. Orders channel messages report how much of each order has filled, if the fills seen for
+    an order fall behind that for longer than grace_s (a fill missed over a reconnect) the ledger has
+    drifted and due() asks for a REST reconcile, as it does every reconcile_s regardless.
+
+    The per order tracking survives a seed: a gap between the filled size reported and the fills seen is
+    taken to be in the REST snapshot, and is credited against the late fills of that order so they are not
+    applied twice. Fills are deduplicated by fill id. Callers should apply every fill already received
+    before seeding.
+    """
+    FILL_IDS = 1000  # recent fill ids kept for deduplication
+    NO_POSITION = 'No Position 没有'
+
+    def __init__(self, contract: str, spot: bool = False, reconcile_s: float = 30, grace_s: float = 2) -> None:
+        self.contract = contract
+        self.spot = spot
+        self.coin = contract.split('/')[0] if spot else None
+        self.reconcile_s = reconcile_s
+        self.grace_s = grace_s
+        self.seeded = False
+        self.seeded_at = 0.0
+        self.quantity = 0.0  # signed position size, or total coin balance for spot
+        self.price: Optional[float] = None  # average open price of the position, REST may not have one
+        self.reserved = 0.0  # spot coin held by orders outside this market at the last seed
+        self.fees: Dict[str, float] = {}  # fee currency -> fees paid since the last seed
+        self.filled: Dict[int, List] = {}  # order id -> [filled size reported by orders, by fills, since, closed]
+        self.absorbed: Dict[int, float] = {}  # order id -> filled size in the last seed not yet seen as fills
+        self.fill_ids = deque([], maxlen=self.FILL_IDS)
+        self._fill_id_set = set()
+
+    def seed(self, positions: Optional[List[Dict]] = None, balances: Optional[List[Dict]] = None,
+             locked: float = 0.0) -> None:
+        """
+        reset from the REST api, locked is the spot coin held by open sell orders in this market
+        """
+        self.quantity, self.price, self.reserved = 0.0, None, 0.0
+        if self.spot:
+            for balance in balances or []:
+                if balance['coin'] == self.coin:
+                    self.quantity = balance['total']
+                    self.reserved = max(round(balance['total'] - balance['free'] - locked, 8), 0.0)
+        else:
+            for position in positions or []:
+                if position['future'] == self.contract and position['size'] != 0:
+                    self.quantity = position['size'] * (1 if position['side'] == 'buy' else -1)
+                    self.price = position['recentAverageOpenPrice']
+        self.fees = {}
+        # credits of the previous seed have had a whole reconcile period for their fills to arrive
+        self.absorbed = {}
+        for order_id, tracked in list(self.filled.items()):
+            if tracked[0] > tracked[1]:
+                self.absorbed[order_id] = round(tracked[0] - tracked[1], 8)
+                tracked[1] = tracked[0]
+            if tracked[3]:
+                del self.filled[order_id]
+        self.seeded = True
+        self.seeded_at = time.monotonic()
+
+    def applyFill(self, fill: Dict) -> None:
+        """
+        eg: {'market': 'BTC-PERP', 'side': 'buy', 'size': 0.01, 'price': 30000.5, 'fee': 0.2,
+             'feeCurrency': 'USD', 'orderId': 1234, ...}
+        """
+        fill_id = fill.get('id')
+        if fill_id is not None:
+            if fill_id in self._fill_id_set:
+                return
+            if len(self.fill_ids) == self.FILL_IDS:
+                self._fill_id_set.discard(self.fill_ids[0])
+            self.fill_ids.append(fill_id)
+            self._fill_id_set.add(fill_id)
+        size, price = fill['size'], fill['price']
+        fee, currency = fill.get('fee') or 0, fill.get('feeCurrency')
+        order_id = fill.get('orderId')
+        credit = self.absorbed.get(order_id, 0)
+        if credit:
+            # already in the seed
+            taken = min(credit, size)
+            self.absorbed[order_id] = round(credit - taken, 8)
+            if not self.absorbed[order_id]:
+                del self.absorbed[order_id]
+            fee = fee * (size - taken) / size
+            size = round(size - taken, 8)
+            if not size:
+                return
+        delta = size if fill['side'] == 'buy' else -size
+        if self.spot:
+            self.quantity = round(self.quantity + delta, 8)
+        else:
+            quantity = round(self.quantity + delta, 8)
+            if quantity == 0:
+                self.price = None
+            elif self.quantity == 0 or (quantity > 0) != (self.quantity > 0) or self.price is None:
+                # opened, or reversed through flat, at the fill price. also when the seed had no price
+                self.price = price
+            elif abs(quantity) > abs(self.quantity):
+                self.price = (self.price * abs(self.quantity) + price * size) / abs(quantity)
+            self.quantity = quantity
+        if currency:
+            self.fees[currency] = round(self.fees.get(currency, 0) + fee, 8)
+            if self.spot and currency == self.coin:
+                self.quantity = round(self.quantity - fee, 8)
+        if order_id is not None:
+            self._track(order_id, fills=size)
+
+    def orderUpdate(self, order: Dict) -> None:
+        """
+        record the filled size an orders channel message reports
+        """
+        if order['filledSize']:
+            self._track(order['id'], reported=order['filledSize'], closed=order['status'] == 'closed')
+
+    def _track(self, order_id: int, reported: Optional[float] = None, fills: float = 0, closed: bool = False) -> None:
+        tracked = self.filled.setdefault(order_id, [0.0, 0.0, time.monotonic(), False])
+        if reported is not None:
+            tracked[0] = max(tracked[0], reported)
+        tracked[3] = tracked[3] or closed
+        tracked[1] = round(tracked[1] + fills, 8)
+        if tracked[1] >= tracked[0]:
+            # caught up, the next gap is timed from now
+            tracked[2] = time.monotonic()
+            if tracked[3]:
+                del self.filled[order_id]
+
+    def drifted(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return any(reported > seen and now - since > self.grace_s for reported, seen, since, _ in self.filled.values())
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """
+        True when a REST reconcile is needed
+        """
+        now = time.monotonic() if now is None else now
+        return not self.seeded or now - self.seeded_at > self.reconcile_s or self.drifted(now)
+
+    def display(self, locked: float = 0.0) -> Dict:
+        """
+        the position box dict, spot holdings are shown as free | total
+        """
+        if self.spot:
+            free = round(max(self.quantity - self.reserved - locked, 0.0), 8)
+            if self.quantity == 0:
+                return {'side': None, 'quantity': None, 'price': None, 'string': self.NO_POSITION}
+            side = 'buy' if free != 0 else None
+            side_str = 'Long' if side == 'buy' else ''
+            quantity = f'{free} | {self.quantity}'
+            return {'side': side, 'quantity': quantity, 'price': None,
+                    'string': f'{side_str} {quantity} {self.coin}'}
+        if self.quantity == 0:
+            return {'side': None, 'quantity': None, 'price': None, 'string': self.NO_POSITION}
+        side = 'buy' if self.quantity > 0 else 'sell'
+        direction = 'Long' if side == 'buy' else 'Short'
+        price = round(self.price, 8) if self.price is not None else None
+        return {'side': side, 'quantity': self.quantity, 'price': price,
+                'string': f'{direction} {abs(self.quantity)} @ {price}'}
@@ -3,12 +3,17 @@
 
 import PyQt5.QtCore
 
-import asyncio
 
-from ws_streams import FTXStream
+from ws_streams.StreamHub import StreamHub
+from ws_streams.MarketFeed import MarketFeed
+from ws_streams.MessageChannel import MessageChannel
+from ws_streams.OrderStore import OrderStore
+from ws_streams.PositionLedger import PositionLedger
 from api_handler.DataManager import HttpCleaner
 from api_handler.RestAPIs import ftxAPI
-from utils.utilfunc import cleanTradeData, conHTTP, mergeForQuoteBoard, staticTable, aggregateVolume, aggregateOrders
+from api_handler.AsyncRestAPIs import gather
+from utils.utilfunc import cleanTradeData, QuoteBoardMerger, aggregateOrders
+from utils.TickQuantizer import TickQuantizer
 from utils.defines import FTX
 
 class WorkerSignals(PyQt5.QtCore.QObject):
@@ -59,13 +64,7 @@ class httpRequestPrivateThread(PyQt5.QtCore.QRunnable):
             try:
                 if self.feed == 'accounts':
 
-                    req_dict = {'balances': self.channel.balances,
-                                'positions': self.channel.positions,
-                                'orders': self.channel.orders}
-
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(conHTTP(req_dict))
+                    req_dict = self.channel.accounts()
                     self.signals.accounts_signal.emit(req_dict) #emit for account section in mainwindow
                     self.signals.trigger_orders_signal.emit(req_dict['orders']['trigger']) #emit for ladder display
                     PyQt5.QtCore.QThread.msleep(1000)
@@ -81,28 +80,29 @@ class httpRequestPrivateThread(PyQt5.QtCore.QRunnable):
 
 
 class httpRequestPublicThread(PyQt5.QtCore.QRunnable):
-    def __init__(self, feed = None):
+    def __init__(self, feed = None, refresh_ms=6000):
         PyQt5.QtCore.QRunnable.__init__(self)
         self.signals = WorkerSignals()
         self.feed = feed
+        # quote boards only repaint the cells that changed, so a faster poll can be set with quote_refresh_ms
+        self.refresh_ms = refresh_ms
         self.closed = False
         self.channel = HttpCleaner(ignore_account=True)
+        self.merger = QuoteBoardMerger()
 
     def run(self):
         while not self.closed:
             try:
                 if self.feed == 'quote_board':
-                    req_dict = {'markets': self.channel.ftx.markets,
-                                'futures': self.channel.ftx.futures,
-                                'funding': self.channel.ftx.fundingRates,
-                                'lending': self.channel.ftx.lendingRates}#,
-                                #'borrowing': None} #this only works if you have completed customer verification for spot margin
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(conHTTP(req_dict))
-                    df = mergeForQuoteBoard(req_dict)
+                    api = self.channel.ftx_async
+                    req_dict = api.run(gather({'markets': api.markets(),
+                                               'futures': api.futures(),
+                                               'funding': api.fundingRates(),
+                                               'lending': api.lendingRates()}))#,
+                                               #'borrowing': None} #this only works if you have completed customer verification for spot margin
+                    df = self.merger.merge(req_dict)
                     self.signals.quotes_signal.emit(df)
-                    PyQt5.QtCore.QThread.msleep(6000)
+                    PyQt5.QtCore.QThread.msleep(self.refresh_ms)
 
             except Exception as e:
                 print([f'[EXCEPTION] - Exception in httpRequestPublicThread {e}'])
@@ -118,7 +118,10 @@ class WebsocketThread(PyQt5.QtCore.QRunnable):
                                   'DOT-PERP', 'SOL-PERP', 'CRV-PERP']):
         PyQt5.QtCore.QRunnable.__init__(self)
 
-        self.markets = markets
+        self.markets = list(markets)
+        self.stream = None
+        self.trades_list = MessageChannel(10000)
+        self.wait_timeout_ms = 1000 #upper bound on a wait with no trades, to pick up stop
 
         self.signals = WorkerSignals()
         self.channel = HttpCleaner(ignore_account=True)
@@ -126,27 +129,42 @@ class WebsocketThread(PyQt5.QtCore.QRunnable):
         self.closed = False
 
     def run(self):
-        self.stream = FTXStream.FtxWebsocketClient()
-        for market in self.markets:
-            self.stream.get_trades(market)
+        self.stream = StreamHub.public()
+        for market in list(self.markets):
+            self.stream.subscribe({'channel': 'trades', 'market': market}, self.receiveTrades)
 
         threshold = 20_000
         while not self.closed:
-            while len(self.stream.trades_list) > 0:
-                message = self.stream.trades_list.popleft()
+            for message in self.trades_list.drain(timeout=self.wait_timeout_ms / 1000):
                 formatted = cleanTradeData(message, threshold)
                 self.signals.trades_signal.emit(formatted)
 
-            PyQt5.QtCore.QThread.msleep(300)
+    def receiveTrades(self, message):
+        # called from the websocket thread
+        self.trades_list.put(message)
 
+    def addMarket(self, market):
+        if market in self.markets:
+            return
+        self.markets.append(market)
+        if self.stream:
+            self.stream.subscribe({'channel': 'trades', 'market': market}, self.receiveTrades)
 
+    def removeMarket(self, market):
+        if market not in self.markets:
+            return
+        self.markets.remove(market)
+        if self.stream:
+            self.stream.unsubscribe({'channel': 'trades', 'market': market}, self.receiveTrades)
 
     def stop(self):
         self.closed = True
-        self.stream.keep_running = False
-        self.stream.stopHeartBeat()
-        self.stream._unsubscribe_all()
-        self.stream.closedFlag = True
+        self.trades_list.close()
+        if self.stream:
+            for market in self.markets:
+                self.stream.unsubscribe({'channel': 'trades', 'market': market}, self.receiveTrades)
+            StreamHub.release(self.stream)
+            self.stream = None
 
 class DownloadPublicThread(PyQt5.QtCore.QRunnable):
     """
@@ -155,7 +173,8 @@ class DownloadPublicThread(PyQt5.QtCore.QRunnable):
     TODO: https://stackoverflow.com/questions/58327821/how-to-pass-parameters-to-pyqt-qthreadpool-running-function
     """
 
-    def __init__(self, exchange=None, contract=None, parent=None, specs=None, launch_agg = None):
+    def __init__(self, exchange=None, contract=None, parent=None, specs=None, launch_agg = None, coalesce_ms = 20,
+                 groupings=()):
 
         PyQt5.QtCore.QRunnable.__init__(self)
 
@@ -166,53 +185,47 @@ class DownloadPublicThread(PyQt5.QtCore.QRunnable):
         self.closed = False
         self.agg_change_flag = False
         self.refresh_flag = True #signals to refresh whole volume profile after change in aggregation as model updates on diff usually
-        self.stream = ''
+        self.stream = None
+        self.feed = None
         self.signals = WorkerSignals()
-        self.thread_sleep = 75
-        self.volume_profile = {}
+        self.coalesce_ms = coalesce_ms #window to batch a burst of book/trade messages into one gui update
+        self.wait_timeout_ms = 1000 #upper bound on a wait with no market data, to pick up stop/aggregation changes
+        self.groupings = groupings #volume profile is kept at each of these so switching aggregation is instant
 
     def run(self):
 
-        self.stream = FTXStream.FtxWebsocketClient(agg_choice = self.agg)
-        self.stream._subscribe({'channel': 'orderbookGrouped', 'market': self.contract, 'grouping': self.agg})
-        self.stream._subscriptions.append({'channel': 'orderbookGrouped', 'market': self.contract, 'grouping': self.agg})
-        self.stream.get_trades(self.contract)
+        self.stream = StreamHub.public()
+        self.feed = MarketFeed(self.stream, self.contract, agg_choice=self.agg, tick_size=self.tick,
+                               groupings=self.groupings)
+        self.feed.start()
 
-
-        book_counter = 0
-        trade_counter = 0
         while not self.closed:
             if self.agg_change_flag:
                 self.manageSubscriptions()
                 self.agg_change_flag = False
                 self.agg = self.new_agg
-                PyQt5.QtCore.QThread.msleep(self.thread_sleep)
                 self.refresh_flag = True
             else:
                 try:
-                    data = staticTable(self.stream.orderbook_state)
-                    if data['counter'] != 0 and data['counter'] != book_counter:
-                        mid = (data['best'][0] + data['best'][1]) / 2 #mid price for centering the ladders. use rather than last trade
-                        self.signals.price_feed_signal.emit(data)
-                        self.signals.last_trade_signal.emit(mid)
-                        book_counter = data['counter']
-                        PyQt5.QtCore.QThread.msleep(self.thread_sleep)
-                    else:
-                        PyQt5.QtCore.QThread.msleep(self.thread_sleep)
-                    if self.stream.trade_volume_dict['counter'] != trade_counter \
-                            and \
-                            self.stream.trade_volume_dict['counter'] != 0:
-
-                        volume_profile = aggregateVolume(self.stream.trade_volume_dict,self.agg, self.tick)
-                        # only emit the changes between current memory dict and new dict
-                        dict_diff = {k: volume_profile[k] for k, _ in
-                                     set(volume_profile.items()) - set(self.volume_profile.items())}
-                        self.signals.volume_profile_signal.emit([volume_profile, dict_diff, self.refresh_flag])
+                    updates = self.feed.waitForUpdate(timeout=self.wait_timeout_ms / 1000,
+                                                      coalesce=self.coalesce_ms / 1000)
+                    if 'book' in updates:
+                        # the ladder takes the newest table itself, so nothing is copied here
+                        best = self.feed.snapshots.best()
+                        self.signals.price_feed_signal.emit(self.feed.snapshots)
+                        # with one side of the book empty its best price is 0, the ladder keeps its centre
+                        if best[0] and best[1]:
+                            mid = (best[0] + best[1]) / 2 #mid price for centering the ladders. use rather than last trade
+                            self.signals.last_trade_signal.emit(mid)
+                    if 'trades' in updates or self.refresh_flag:
+                        grouping = self.agg if self.agg else self.tick
+                        # only the buckets the new trades fell in, everything after a change of aggregation
+                        if self.refresh_flag:
+                            buckets, volumes = self.feed.volume_profile.snapshot(grouping)
+                        else:
+                            buckets, volumes = self.feed.volume_profile.changes(grouping)
+                        self.signals.volume_profile_signal.emit([grouping, buckets, volumes, self.refresh_flag])
                         self.refresh_flag = False
-                        trade_counter = self.stream.trade_volume_dict['counter']
-                        self.volume_profile = volume_profile.copy()
-                        PyQt5.QtCore.QThread.msleep(5)
-                    PyQt5.QtCore.QThread.msleep(5)
 
                 except Exception as e:
                     print([f'[EXCEPTION] - Exception in DownloadPublicThread {e}'])
@@ -225,37 +238,30 @@ class DownloadPublicThread(PyQt5.QtCore.QRunnable):
     def changeAggregation(self, grouping):
         self.new_agg = grouping
         self.agg_change_flag = True
+        if self.feed:
+            self.feed.wake()
 
     def clearVolumeProfile(self):
-        self.stream.reset_volume_profile()
+        self.feed.reset_volume_profile()
         self.refresh_flag = True
+        self.feed.wake()
 
     def manageSubscriptions(self):
-        # unsub from agg
-        self.stream.agg_choice = self.new_agg  # tells websocket connection to ignore the last of the old aggregation data
-        if self.agg == 'full':
-            self.stream._unsubscribe({'channel': 'orderbook', 'market': self.contract})
-        else:
-            self.stream._unsubscribe({'channel': 'orderbookGrouped', 'market': self.contract, 'grouping': self.agg})
-        PyQt5.QtCore.QThread.msleep(500)
-        # sub to new agg
-        if self.new_agg == 'full':
-            self.stream._subscribe({'channel': 'orderbook', 'market': self.contract})
-        else:
-            self.stream._subscribe({'channel': 'orderbookGrouped', 'market': self.contract, 'grouping': self.new_agg})
-
-        return
+        # the feed drops its callback for the old aggregation before subscribing to the new one
+        self.feed.changeAggregation(self.new_agg)
 
     def stop(self):
-        self.stream.stop()
-        self.stream.closedFlag = True
         self.closed = True
+        if self.feed:
+            self.feed.wake()
+            self.feed.stop()
+            StreamHub.release(self.stream)
+            self.feed = None
 
 class DownloadPrivateThread(PyQt5.QtCore.QRunnable):
 
     def __init__(self, exchange=None, contract=None, parent=None, specs=None, keys=None, agg=None):
         PyQt5.QtCore.QRunnable.__init__(self)
-        self.order_dict = {}
         self.position_dict = {'side': None, 'quantity': None, 'price': None}
         self.contract = contract
         self.exchange = exchange
@@ -264,42 +270,74 @@ class DownloadPrivateThread(PyQt5.QtCore.QRunnable):
 
         self.specs = specs
         self.spot_flag = True if specs['type'] == 'spot' else False
+        self.ledger = PositionLedger(contract, spot=self.spot_flag) #position kept from fills, reconciled with REST when due
         self.agg = agg
+        self.ticks = TickQuantizer(specs['tick_size']) #order dicts are keyed by tick index
+        self.orders = OrderStore(self.ticks, self.ticks.ratio(agg)) #open orders by id, tick index and ladder bucket
+        self.aggregated_order_dict = {}
 
         self.closed = False
-        self.stream = ''
+        self.stream = None
+        self.order_position = MessageChannel(10000)
+        self.dropped_seen = 0 #order_position overflows seen, orders and position are reloaded from REST after one
         self.signals = WorkerSignals()
         self.channel = ftxAPI(public=self.api_key, private=self.api_secret)
-        self.thread_sleep = 20
+        self.wait_timeout_ms = 1000 #upper bound on a wait with no private messages, to pick up stop and reconciles
 
         self.trigger_orders = {}
+        self.trigger_ladder = {} #aggregated trigger orders, redone when the triggers or the aggregation change
+        self.trigger_ratio = None
 
     def run(self):
 
         if self.exchange == FTX:
             self.initOrderDict(self.channel.activeOrders())
-            self.trigger_orders = self.initTriggerDict(self.channel.triggerOrders())
-            self.updateLadderOrders()
+            self.receive_trigger_orders(self.initTriggerDict(self.channel.triggerOrders()))
             self.updateLadderPosition()
-            self.stream = FTXStream.FtxWebsocketClient(api_key=self.api_key, api_secret=self.api_secret)
+            self.stream = StreamHub.private(self.api_key, self.api_secret)
 
-            self.stream.get_orders()
-            self.stream.get_fills()
+            self.stream.subscribe({'channel': 'orders'}, self.receivePrivate)
+            self.stream.subscribe({'channel': 'fills'}, self.receivePrivate)
 
             while not self.closed:
-                while self.stream.order_position:
-                    message = self.stream.order_position.pop(0)
-                    if message['data']['market'] == self.contract:
-                        if message['channel'] == 'orders':
-                            self.process_order(message)
-                            self.handle_order_sound_action(message)
+                try:
+                    self.processMessages(self.order_position.drain(timeout=self.wait_timeout_ms / 1000))
+                    if self.order_position.dropped != self.dropped_seen:
+                        # order events were lost, the store and ledger can no longer be trusted
+                        self.dropped_seen = self.order_position.dropped
+                        self.initOrderDict(self.channel.activeOrders())
+                        self.updateLadderPosition()
+                    elif self.ledger.due():
+                        self.updateLadderPosition()
+                except Exception as e:
+                    print([f'[EXCEPTION] - Exception in DownloadPrivateThread {e}'])
+                    # the rest of the batch is lost, reload orders and position on the next pass
+                    self.dropped_seen = -1
+                    PyQt5.QtCore.QThread.msleep(2000)
 
-                        elif message['channel'] == 'fills':
-                            self.signals.sound_signal.emit('fills')
-                            self.updateLadderPosition()
+    def processMessages(self, messages):
+        filled, orders_changed = False, False
+        for message in messages:
+            if message['data']['market'] == self.contract:
+                if message['channel'] == 'orders':
+                    orders_changed |= self.process_order(message)
+                    self.handle_order_sound_action(message)
+
+                elif message['channel'] == 'fills':
+                    self.ledger.applyFill(message['data'])
+                    filled = True
+        # one ladder update, one sound and one position update for a burst of messages
+        if orders_changed:
+            self.updateLadderOrders()
+        if filled:
+            self.signals.sound_signal.emit('fills')
+        if filled or (orders_changed and self.spot_flag):
+            # resting sells change the spot free balance
+            self.emitPosition()
 
-                    PyQt5.QtCore.QThread.msleep(10)
-                PyQt5.QtCore.QThread.msleep(self.thread_sleep)
+    def receivePrivate(self, message):
+        # called from the websocket thread
+        self.order_position.put(message)
 
     def update_snapshot(self, data):
         self.signals.price_feed_signal.emit(data['result'])
@@ -307,7 +345,9 @@ class DownloadPrivateThread(PyQt5.QtCore.QRunnable):
     def process_order(self, message):
         if self.exchange == FTX:
             if message['data']['market'] == self.contract:
-                self.update_order_dict(message['data'])
+                self.ledger.orderUpdate(message['data'])
+                return self.update_order_dict(message['data'])
+        return False
 
     def handle_order_sound_action(self, message):
         if message['data']['filledSize'] == 0 and message['data']['status'] == 'closed':
@@ -315,24 +355,7 @@ class DownloadPrivateThread(PyQt5.QtCore.QRunnable):
         self.signals.sound_signal.emit('orders')
 
     def initOrderDict(self, active_orders):
-        if not active_orders:
-            self.aggregated_order_dict = {}
-            return
-        for order in active_orders:
-            if order['market'] != self.contract:
-                continue
-            price, qty, order_id, side = order['price'], order['remainingSize'], order['id'], order['side']
-            if price not in self.order_dict.keys():
-                self.order_dict[price] = {'quantity' : qty,
-                                          'side': side,
-                                          'orders': [order],
-                                          'order_id': [order_id]}
-            else:
-                # multiple orders at the same price
-                self.order_dict[price]['quantity'] += qty
-                self.order_dict[price]['order_id'].append(order_id)
-                self.order_dict[price]['orders'].append(order)
-
+        self.orders.load(order for order in active_orders or [] if order['market'] == self.contract)
         self.updateLadderOrders()
 
     def initTriggerDict(self, trigger_orders):
@@ -341,7 +364,7 @@ class DownloadPrivateThread(PyQt5.QtCore.QRunnable):
             if order['market'] != self.contract:
                 continue
             market = order['market']
-            price = order['triggerPrice']
+            price = self.ticks.index(order['triggerPrice'])
             qty = order['size']
             side = order['side']
             order_id = order['id']
@@ -359,138 +382,62 @@ class DownloadPrivateThread(PyQt5.QtCore.QRunnable):
 
     def updateLadderPosition(self):
         """
+        reconcile the ledger with the REST positions, or balances for spot
         Spot positions treated differently as holding spot is not considered a position
         """
+        # fills already received are in the REST snapshot, apply them first so they are not applied after it
+        self.processMessages(self.order_position.drain(timeout=0))
         if self.spot_flag:
-            spot_balances = self.channel.balance()
-            spot_coin = self.contract.split('/')[0]
-            self.position_dict = {'side': None, 'quantity': None, 'price': None, 'string': 'No Position 没有'}
-            for spot_info in spot_balances:
-                if spot_info['coin'] == spot_coin:
-                    total, free = spot_info['total'], spot_info['free']
-                    side = 'buy' if free != 0 else None
-                    side_str = 'Long' if side == 'buy' else ''
-                    quantity = f'{free} | {total}'
-                    string = f'{side_str} {quantity} {spot_coin}'
-                    self.position_dict = {'side': side, 'quantity': quantity, 'price': None, 'string': string}
+            self.ledger.seed(balances=self.channel.balance(), locked=self.orders.resting['sell'])
         else:
             positions = self.channel.getAllPositions(self.contract)
+            self.ledger.seed(positions=positions)
             if not positions:
                 #not logged in
                 return
-            found = False
-            for position in positions:
-                if position['size'] != 0 and position['future'] == self.contract:
-                    found = True
-                    size, side, price = position['size'], position['side'], position['recentAverageOpenPrice']
-
-                    self.position_dict['quantity'] = size * (1 if side == 'buy' else -1)
-                    self.position_dict['price'] = price
-                    self.position_dict['side'] = side
-
-                    direction = 'Long' if side == 'buy' else 'Short'
-                    sizing = abs(self.position_dict['quantity'])
-                    self.position_dict['string'] = f'{direction} {sizing} @ {price}'
-            if not found:
-                self.position_dict = {'side': None,
-                                      'quantity': None,
-                                      'price': None,
-                                      'string': 'No Position 没有'}
+        self.emitPosition()
+
+    def emitPosition(self):
+        self.position_dict = self.ledger.display(locked=self.orders.resting['sell'])
         self.signals.position_feed_signal.emit(self.position_dict)
 
     def refreshTriggers(self):
-        self.trigger_orders = self.initTriggerDict(self.channel.triggerOrders())
-        self.updateLadderOrders()
+        self.receive_trigger_orders(self.initTriggerDict(self.channel.triggerOrders()))
 
     def updateLadderOrders(self):
-        self.aggregated_order_dict = aggregateOrders(self.order_dict, self.trigger_orders, self.agg, self.specs['tick_size'])
-        self.signals.order_feed_signal.emit(self.aggregated_order_dict.copy())
+        """
+        open orders come aggregated from the order store, trigger orders are aggregated again only when
+        they are refreshed or the ladder aggregation changes. called from the GUI thread on agg change
+        """
+        ratio = self.ticks.ratio(self.agg)
+        self.orders.setRatio(ratio)
+        ladder = self.orders.ladderOrders()
+        if self.trigger_ratio != ratio:
+            self.trigger_ladder = aggregateOrders({}, self.trigger_orders, ratio)
+            self.trigger_ratio = ratio
+        for bucket, values in self.trigger_ladder.items():
+            ladder[bucket] = {**ladder[bucket], **values} if bucket in ladder else values
+        self.aggregated_order_dict = ladder
+        self.signals.order_feed_signal.emit(ladder.copy())
 
     def update_order_dict(self, message):
-        price = message['price']
-        remain_size = message['remainingSize']
-        size = message['size']
-        side = message['side']
-        order_id = message['id']
-        status = message['status']
-        filledSize = message['filledSize']
-        no_order_condition = (price not in self.order_dict.keys()
-                              or
-                              (price in self.order_dict.keys() and self.order_dict[price]['quantity'] == 0))
-        if no_order_condition:
-            if status in ['open', 'new']:
-                self.order_dict[price] = {'quantity' : remain_size,
-                                          'side': side,
-                                          'orders': [message],
-                                          'order_id': [order_id]}
-            elif status == 'closed':
-                #this arises where post only is not filled
-                pass
-
-        else:
-            if order_id in self.order_dict[price]['order_id']:
-                # replace old message with new message for an order_id
-                for order in self.order_dict[price]['orders']:
-                    if order['id'] == order_id:
-                        self.order_dict[price]['orders'].remove(order)
-                        self.order_dict[price]['orders'].append(message)
-                    else:
-                        pass
-                        #print('order id not equal')
-
-            else:
-                # adding another order onto a price
-                self.order_dict[price]['order_id'].append(order_id)
-                self.order_dict[price]['orders'].append(message)
-
-            # recalculate the remaining quantity for a price
-            qty = 0
-            for order in self.order_dict[price]['orders']:
-                qty += order['remainingSize']
-            self.order_dict[price]['quantity'] = round(qty, 8)
-            # remove the orders/order_ids where the remaining size = 0
-            self.order_dict[price]['orders'] = [order for order in self.order_dict[price]['orders'] if
-                                                order['remainingSize'] != 0]
-            self.order_dict[price]['order_id'] = [order['id'] for order in self.order_dict[price]['orders']]
-
-        self.updateLadderPosition()
-        self.updateLadderOrders()
+        """
+        O(1) in the number of resting orders, returns True if the ladder needs updating
+        positions are updated from fills
+        """
+        return self.orders.apply(message)
 
     def receive_trigger_orders(self, trigger_orders):
         self.trigger_orders = trigger_orders
+        self.trigger_ratio = None
         self.updateLadderOrders()
 
-    def defaultify(self, d):
-        if not isinstance(d, dict):
-            return d
-        return defaultdict(lambda: defaultdict(float), {k: self.defaultify(v) for k, v in d.items()})
-
-    def generateDisplayOrderDict(self, order_dict):
-        """
-        for table model, the order data is
-        defaultified
-        order_dict = {'buys': {'open_buys' : {2000 : [1, 0],
-                                              2001 : [5, 0]},
-                               'trigger_buys' : {3000 : [4, 1],
-                                                 3005 : [5, 1]}
-                      'sells' : {'open_sells' : {2500 : [1,0]},
-                                 'trigger_sells' : { 1800 : [5, 1]}}
-
-        """
-        d = {}
-        d['open_buys'] = self.defaultify(
-            {k: [order_dict[k]['quantity'], 0] for k in order_dict if order_dict[k]['side'] == 'buy'})
-        d['open_sells'] = self.defaultify(
-            {k: [order_dict[k]['quantity'], 0] for k in order_dict if order_dict[k]['side'] == 'sell'})
-        d['trigger_buys'] = self.defaultify(
-            {k: [self.trigger_orders[k]['quantity'], 1] for k in self.trigger_orders.keys() if self.trigger_orders[k]['side'] == 'buy'})
-        d['trigger_sells'] = self.defaultify(
-            {k: [self.trigger_orders[k]['quantity'], 1] for k in self.trigger_orders.keys() if self.trigger_orders[k]['side'] == 'sell'})
-        return d
-
-
     def stop(self):
         self.closed = True
-        self.stream.stop()
-        self.stream.closedFlag = True
+        self.order_position.close()
+        if self.stream:
+            self.stream.unsubscribe({'channel': 'orders'}, self.receivePrivate)
+            self.stream.unsubscribe({'channel': 'fills'}, self.receivePrivate)
+            StreamHub.release(self.stream)
+            self.stream = None
 
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from threading import Lock
+from typing import Dict
+
+try:
+    from FTXStream import FtxWebsocketClient
+except:
+    from ws_streams.FTXStream import FtxWebsocketClient
+
+
+class StreamHub:
+    """
+    Owns the websocket connections shared by all DOM ladders and the activity feed.
+
+    There is one public connection, and one authenticated connection per set of api keys. Each user
+    takes a connection with public() or private() and gives it back with release(). The connection is
+    closed when its last user releases it. Subscriptions on a connection are reference counted by
+    FtxWebsocketClient.subscribe() / unsubscribe().
+    """
+    _lock = Lock()
+    _public = None
+    _private: Dict[str, FtxWebsocketClient] = {}
+    _users: Dict[int, int] = {}
+
+    @classmethod
+    def public(cls) -> FtxWebsocketClient:
+        with cls._lock:
+            if cls._public is None:
+                cls._public = FtxWebsocketClient()
+            return cls._acquire(cls._public)
+
+    @classmethod
+    def private(cls, api_key: str, api_secret: str) -> FtxWebsocketClient:
+        with cls._lock:
+            if api_key not in cls._private:
+                cls._private[api_key] = FtxWebsocketClient(api_key=api_key, api_secret=api_secret)
+            return cls._acquire(cls._private[api_key])
+
+    @classmethod
+    def _acquire(cls, client: FtxWebsocketClient) -> FtxWebsocketClient:
+        cls._users[id(client)] = cls._users.get(id(client), 0) + 1
+        return client
+
+    @classmethod
+    def release(cls, client: FtxWebsocketClient) -> None:
+        with cls._lock:
+            if id(client) not in cls._users:
+                return
+            cls._users[id(client)] -= 1
+            if cls._users[id(client)] > 0:
+                return
+            del cls._users[id(client)]
+            if client is cls._public:
+                cls._public = None
+            for api_key, private in list(cls._private.items()):
+                if private is client:
+                    del cls._private[api_key]
+        client.stop()
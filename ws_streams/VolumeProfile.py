@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from utils.TickQuantizer import TickQuantizer
+
+
+class ProfileLevel:
+    """
+    Volume profile at one grouping, ratio contract ticks to a bucket.
+
+    Buckets are integer indexes at the grouping (bucket b is the price b * ratio * tick). Buys are put in
+    the bucket at or above the trade price and sells in the bucket below it, at ratio 1 both sides go to
+    the trade price. values[i] holds bucket first + i, dirty collects the buckets changed since the last read.
+    """
+
+    def __init__(self, ratio: int) -> None:
+        self.ratio = ratio
+        self.first = 0
+        self.values = np.zeros(0)
+        self.dirty = set()
+
+    def buckets(self, tick_index, side: str):
+        """
+        bucket of a tick index, works on ints and numpy arrays
+        """
+        if self.ratio == 1:
+            return tick_index
+        upper = TickQuantizer.regroup(tick_index, self.ratio, up=True)
+        return upper if side == 'buy' else upper - 1
+
+    def fit(self, origin: int, size: int) -> None:
+        """
+        resize values to cover every bucket of the contract ticks origin to origin + size - 1
+        """
+        if size == 0:
+            self.first, self.values = 0, np.zeros(0)
+            return
+        first = origin // self.ratio - 1
+        end = -(-(origin + size - 1) // self.ratio) + 1
+        values = np.zeros(end - first)
+        if len(self.values):
+            start = self.first - first
+            values[start:start + len(self.values)] = self.values
+        self.first, self.values = first, values
+
+    def build(self, origin: int, buy: np.ndarray, sell: np.ndarray) -> None:
+        self.fit(origin, len(buy))
+        tick_indexes = np.arange(origin, origin + len(buy))
+        for side, volumes in (('buy', buy), ('sell', sell)):
+            traded = volumes != 0
+            np.add.at(self.values, self.buckets(tick_indexes[traded], side) - self.first, volumes[traded])
+
+    def add(self, tick_index: int, side: str, size: float) -> None:
+        bucket = self.buckets(tick_index, side)
+        self.values[bucket - self.first] += size
+        self.dirty.add(bucket)
+
+    def clear(self) -> None:
+        self.values[:] = 0
+        self.dirty = set()
+
+
+class VolumeProfile:
+    """
+    Traded volume by price for a DOM ladder, updated one trade at a time.
+
+    Buy and sell volume is kept per contract tick in numpy arrays indexed by integer tick index, and every
+    grouping asked for so far is kept up to date alongside as a ProfileLevel, so only the buckets a trade
+    falls in are touched and switching the ladder aggregation needs no rebuild. Trades are added from the
+    websocket thread and read from the ladder thread.
+    """
+    MARGIN = 1000  # ticks opened either side of a trade outside the arrays
+
+    def __init__(self, tick_size: float, groupings: Iterable[float] = ()) -> None:
+        self.ticks = TickQuantizer(tick_size)
+        self.origin = 0
+        self.buy = np.zeros(0)
+        self.sell = np.zeros(0)
+        self.levels: Dict[int, ProfileLevel] = {}
+        self.counter = 0
+        self._lock = Lock()
+        for grouping in groupings:
+            self.level(grouping)
+
+    def level(self, grouping) -> ProfileLevel:
+        """
+        the level of a grouping, built from the tick volumes the first time it is used
+        """
+        ratio = self.ticks.ratio(grouping)
+        if ratio not in self.levels:
+            level = ProfileLevel(ratio)
+            level.build(self.origin, self.buy, self.sell)
+            self.levels[ratio] = level
+        return self.levels[ratio]
+
+    def _ensure(self, tick_index: int) -> None:
+        if len(self.buy) == 0:
+            origin, end = tick_index - self.MARGIN, tick_index + self.MARGIN
+        elif self.origin <= tick_index < self.origin + len(self.buy):
+            return
+        else:
+            origin = min(self.origin, tick_index - self.MARGIN)
+            end = max(self.origin + len(self.buy), tick_index + self.MARGIN)
+        buy, sell = np.zeros(end - origin), np.zeros(end - origin)
+        start = self.origin - origin
+        buy[start:start + len(self.buy)] = self.buy
+        sell[start:start + len(self.sell)] = self.sell
+        self.origin, self.buy, self.sell = origin, buy, sell
+        for level in self.levels.values():
+            level.fit(origin, len(buy))
+
+    def add(self, trades: List[Dict]) -> None:
+        """
+        add FTX trades, eg: [{'price': 1350.5, 'size': 14.81, 'side': 'sell', ...}]
+        """
+        with self._lock:
+            for trade in trades:
+                tick_index = self.ticks.index(trade['price'])
+                self._ensure(tick_index)
+                side_volume = self.buy if trade['side'] == 'buy' else self.sell
+                side_volume[tick_index - self.origin] += trade['size']
+                for level in self.levels.values():
+                    level.add(tick_index, trade['side'], trade['size'])
+            self.counter += 1
+
+    def changes(self, grouping) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (bucket indexes, volumes) of the buckets at grouping changed since the last read
+        """
+        with self._lock:
+            level = self.level(grouping)
+            buckets = np.array(sorted(level.dirty), dtype=int)
+            level.dirty = set()
+            return buckets, level.values[buckets - level.first]
+
+    def snapshot(self, grouping) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (bucket indexes, volumes) of every traded bucket at grouping
+        """
+        with self._lock:
+            level = self.level(grouping)
+            positions = np.flatnonzero(level.values)
+            level.dirty = set()
+            return positions + level.first, level.values[positions]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.buy[:] = 0
+            self.sell[:] = 0
+            for level in self.levels.values():
+                level.clear()
+            self.counter = 0
@@ -1,22 +1,43 @@
 import json
+import random
 import time
-import sys
-from threading import Thread, Lock
+from collections import deque
+from threading import Thread, RLock, Timer
 
 from websocket import WebSocketApp
 
 class WebsocketManager:
+    """
+    Connection state machine, nothing here blocks the caller:
+
+    IDLE -> connect() -> CONNECTING -> on open -> OPEN
+    CONNECTING / OPEN -> closed, error or connect timeout -> BACKOFF -> after delay -> CONNECTING
+    any -> stop() -> CLOSED
+
+    Messages sent while not OPEN are queued and flushed on open, after _on_connected() has restored the
+    connection (login, subscriptions). The reconnect delay grows exponentially with jitter for as long as
+    connections keep failing, it resets once a connection has stayed open for _STABLE_S.
+    """
     _CONNECT_TIMEOUT_S = 5
+    _BACKOFF_BASE_S = 0.5
+    _BACKOFF_MAX_S = 30
+    _STABLE_S = 30
+    _MAX_PENDING = 1000
+
+    IDLE, CONNECTING, OPEN, BACKOFF, CLOSED = 'idle', 'connecting', 'open', 'backoff', 'closed'
 
     def __init__(self):
-        self.connect_lock = Lock()
+        self.connect_lock = RLock()
         self.ws = None
-        self.api_key = ''
-        self.api_secret = ''
-        self._logged_in = False
-        self.closeFlag = False
-        self.subscriptions = []
-        
+        self.closeFlag = False # set by stop(), no reconnects after it
+        self.state = self.IDLE
+        self._pending = deque([], maxlen=self._MAX_PENDING)
+        self._attempts = 0
+        self._opened_at = None
+        self._timer = None # the pending reconnect
+        self._connect_timer = None
+        self._subscriptions = [] # unsubscribed from on stop(), subclasses keep what they subscribed to here
+
 
     def _get_url(self):
         raise NotImplementedError()
@@ -24,46 +45,71 @@ class WebsocketManager:
     def _on_message(self, ws, message):
         raise NotImplementedError()
 
+    def _on_connected(self):
+        """
+        called on open before queued messages are flushed, to log in and restore subscriptions
+        """
+        pass
+
+    @property
+    def connected(self):
+        return self.state == self.OPEN
+
     def send(self, message):
-        self.connect()
-        self.ws.send(message)
+        with self.connect_lock:
+            if self.state == self.OPEN:
+                try:
+                    self.ws.send(message)
+                    return
+                except Exception:
+                    # the socket went away, the close callback reconnects
+                    pass
+            if self.state != self.CLOSED:
+                self._pending.append(message)
+                self.connect()
 
     def send_json(self, message):
         self.send(json.dumps(message))
-        
-    def sendHeartBeat(self):
-        raise NotImplementedError()
 
     def _connect(self):
-        assert not self.ws, "ws should be closed before attempting to connect"
-            
-        self.ws = WebSocketApp(
-            self._get_url(),
-            on_message=self._wrap_callback(self._on_message),
-            on_close=self._wrap_callback(self._on_close),
-            on_error=self._wrap_callback(self._on_error),
-            keep_running=True
-        )
-
-        wst = Thread(target=self._run_websocket, args=(self.ws,))
+        with self.connect_lock:
+            if self.state in (self.CONNECTING, self.OPEN, self.CLOSED):
+                return
+            self.state = self.CONNECTING
+            self._timer = None
+            ws = self.ws = WebSocketApp(
+                self._get_url(),
+                on_open=self._wrap_callback(self._handle_open),
+                on_message=self._wrap_callback(self._on_message),
+                on_close=self._wrap_callback(self._on_close),
+                on_error=self._wrap_callback(self._on_error),
+                keep_running=True
+            )
+
+        wst = Thread(target=self._run_websocket, args=(ws,))
         wst.daemon = True
         wst.start()
-        ts = time.time()
-        timeout = 10
-        while self.ws and (not self.ws.sock or not self.ws.sock.connected) and timeout:
-            timeout -= 1
-            time.sleep(1)
-
-        if self.api_key and self.api_secret:
-            self._login()
-
-        self._reset_subscriptions()
+        self._schedule(self._CONNECT_TIMEOUT_S, self._connect_timeout, ws)
 
-    def _login(self):
-        raise NotImplementedError()
+    def _handle_open(self, ws):
+        with self.connect_lock:
+            if ws is not self.ws or self.state != self.CONNECTING:
+                return
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._on_connected()
+            while self._pending and self.state == self.OPEN:
+                message = self._pending.popleft()
+                try:
+                    ws.send(message)
+                except Exception:
+                    self._pending.appendleft(message)
+                    break
 
-    def _reset_subscriptions(self):
-        raise NotImplementedError()
+    def _connect_timeout(self, ws):
+        with self.connect_lock:
+            if ws is self.ws and self.state == self.CONNECTING:
+                self._reconnect(ws)
 
     def _wrap_callback(self, f):
         def wrapped_f(ws, *args, **kwargs):
@@ -83,29 +129,47 @@ class WebsocketManager:
         except Exception as e:
             raise Exception(f'Unexpected error while running websocket: {e}')
         finally:
-            if self.closeFlag:
-                return
             self._reconnect(ws)
 
+    def _backoff(self):
+        delay = min(self._BACKOFF_MAX_S, self._BACKOFF_BASE_S * 2 ** self._attempts)
+        return delay * random.uniform(0.5, 1.0)
+
     def _reconnect(self, ws):
-        if self.closeFlag:
-            return
-        assert ws is not None, '_reconnect should only be called with an existing ws'
-        if ws is self.ws:
+        """
+        drop ws and schedule the next connect, once per connection however many callbacks report it
+        """
+        with self.connect_lock:
+            if self.closeFlag or ws is not self.ws:
+                return
+            if self._opened_at is not None and time.monotonic() - self._opened_at >= self._STABLE_S:
+                self._attempts = 0
             self.ws = None
-            ws.close()
-            self.connect()
+            self._opened_at = None
+            self.state = self.BACKOFF
+            delay = self._backoff()
+            self._attempts += 1
+            self._schedule(delay, self._connect)
+        ws.close()
+
+    def _schedule(self, delay, f, *args):
+        timer = Timer(delay, f, args)
+        timer.daemon = True
+        if f == self._connect:
+            self._timer = timer
+        elif f == self._connect_timeout:
+            self._connect_timer = timer
+        timer.start()
 
     def connect(self):
-        if self.ws:
-            return
+        """
+        start connecting if idle, returns at once
+        """
         with self.connect_lock:
-            while not self.ws:
+            if self.state == self.IDLE:
                 self._connect()
-                if self.ws:
-                    return
 
-    def _on_close(self, ws):
+    def _on_close(self, ws, *args):
         self._reconnect(ws)
 
     def _on_error(self, ws, error):
@@ -116,4 +180,16 @@ class WebsocketManager:
             self._reconnect(self.ws)
 
     def stop(self):
-        self.ws.close()
+        with self.connect_lock:
+            if self.state == self.OPEN:
+                for subscription in self._subscriptions:
+                    self.send_json({'op': 'unsubscribe', **subscription})
+            self.closeFlag = True
+            self.state = self.CLOSED
+            self._pending.clear()
+            for timer in (self._timer, self._connect_timer):
+                if timer:
+                    timer.cancel()
+            ws, self.ws = self.ws, None
+        if ws:
+            ws.close()